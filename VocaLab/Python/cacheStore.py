@@ -0,0 +1,133 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# 캐시 파일 위치 (모든 워커 프로세스가 같은 SQLite 파일을 공유)
+CACHE_DIR = os.getenv('cache_dir', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache'))
+CACHE_DB_PATH = os.path.join(CACHE_DIR, 'vocalab_cache.db')
+
+
+class TwoTierCache:
+    """프로세스 내 LRU + 디스크 SQLite 2단계 캐시.
+
+    값은 JSON으로 저장되며, SQLite 항목은 ttl_seconds가 지나면 만료되고
+    max_disk_items를 넘으면 오래된 항목부터 삭제된다.
+    """
+
+    def __init__(self, namespace, max_memory_items=1000, ttl_seconds=7 * 24 * 3600,
+                 max_disk_items=50000, db_path=CACHE_DB_PATH):
+        self.namespace = namespace
+        self.max_memory_items = max_memory_items
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_items = max_disk_items
+        self.db_path = db_path
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'writes': 0}
+
+        try:
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cache ("
+                    " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+                    " created_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS cache_created_at ON cache (namespace, created_at)")
+        except sqlite3.Error as e:
+            print(f"Error initializing cache {namespace}: {str(e)}")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def _expired(self, created_at):
+        return self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds
+
+    def get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._expired(entry[1]):
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return entry[0]
+            self._memory.pop(key, None)
+
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, created_at FROM cache WHERE namespace = ? AND key = ?",
+                    (self.namespace, key)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Error reading cache {self.namespace}: {str(e)}")
+            row = None
+
+        with self._lock:
+            if row is None or self._expired(row[1]):
+                self._stats['misses'] += 1
+                return None
+            value = json.loads(row[0])
+            self._remember(key, value, row[1])
+            self._stats['disk_hits'] += 1
+            return value
+
+    def set(self, key, value):
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, value, created_at)
+            self._stats['writes'] += 1
+            self._writes += 1
+            prune = self._writes % 100 == 0
+
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (namespace, key, value, created_at) VALUES (?, ?, ?, ?)",
+                    (self.namespace, key, json.dumps(value, ensure_ascii=False), created_at)
+                )
+                if prune:
+                    self._prune(conn)
+        except sqlite3.Error as e:
+            print(f"Error writing cache {self.namespace}: {str(e)}")
+
+    def delete(self, key):
+        with self._lock:
+            self._memory.pop(key, None)
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+        except sqlite3.Error as e:
+            print(f"Error deleting cache {self.namespace}: {str(e)}")
+
+    def _remember(self, key, value, created_at):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    # 만료 항목과 용량 초과분(오래된 순) 삭제
+    def _prune(self, conn):
+        if self.ttl_seconds is not None:
+            conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND created_at < ?",
+                (self.namespace, time.time() - self.ttl_seconds)
+            )
+        conn.execute(
+            "DELETE FROM cache WHERE namespace = ? AND key IN ("
+            " SELECT key FROM cache WHERE namespace = ? ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.namespace, self.namespace, self.max_disk_items)
+        )
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_items'] = len(self._memory)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['disk_hits']) / lookups, 3) if lookups else 0.0
+        return stats
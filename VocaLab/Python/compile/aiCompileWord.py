@@ -1,17 +1,25 @@
 from flask import Flask, request, jsonify 
 from flask_cors import CORS
 from bs4 import BeautifulSoup
-import requests
 import pytesseract
 from PIL import Image
 import fitz 
 import docx
 import os
 import io
+import json
 import google.generativeai as genai
 from config import Config
 from dotenv import load_dotenv
 import uuid
+import sys
+import hashlib
+
+# 상위 폴더(VocaLab/Python)의 공용 모듈 사용
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from httpClient import http_client
+from structuredOutput import generate_json, generate_records, matches, missing_fields, normalize_key
+from singleFlight import SingleFlight
 
 # .env 파일 로드
 load_dotenv('../env/api.env')
@@ -33,6 +41,16 @@ system_instruction = (
 ) 
 model = genai.GenerativeModel('gemini-1.5-flash', system_instruction=system_instruction)
 
+# 같은 텍스트(같은 단어장 원문)의 동시 Gemini 호출을 1번으로 합치고, 실패는 잠시 기억
+compile_flight = SingleFlight('compile_word')
+
+# 단어장 응답 스키마 ({"단어": 영어 단어, "뜻": 품사 약어 + 한국어 뜻} 배열)
+COMPILE_WORD_SCHEMA = {
+    'type': 'object',
+    'properties': {'단어': {'type': 'string'}, '뜻': {'type': 'string'}},
+    'required': ['단어', '뜻']
+}
+
 @app.route('/apiCompile', methods=['POST'])
 def compile_word():
     print("--python--")
@@ -101,6 +119,12 @@ def compile_word():
         print(f"Error in compile_word: {str(e)}")
         return jsonify({"error": "처리 중 오류 발생", "details": str(e)}), 500
 
+@app.route('/http-stats', methods=['GET'])
+def http_stats():
+    stats = http_client.stats()
+    stats['single_flight'] = compile_flight.stats()
+    return jsonify(stats)
+
 def is_url(string):
     if not string:
         return False
@@ -157,14 +181,8 @@ def process_uploaded_files(files, base_url):
 
 
 
-            # 파일 다운로드
-            response = requests.get(download_url, stream=True)
-            response.raise_for_status()
-            
-            with open(local_file_path, "wb") as file:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        file.write(chunk)
+            # 파일 다운로드 (공용 HTTP 클라이언트: keep-alive, timeout, 크기 제한)
+            http_client.download(download_url, local_file_path)
 
             # 파일 내용 추출
             extracted_text = process_file(local_file_path)
@@ -251,19 +269,47 @@ def process_pdf_with_ocr(pdf_path):
         print(f"PDF 처리 중 오류 발생: {str(e)}")
         return None
 
+# 뜻이 빠진 단어의 뜻만 다시 요청하는 프롬프트
+def build_meaning_prompt(words):
+    return f"다음 영어 단어들의 일반적으로 사용 빈도가 높은 뜻을 작성하세요.\n{json.dumps(words, ensure_ascii=False)}"
+
 def send_text_to_ai(line):
-    print("AI API 호출")
     try:
-        response = model.generate_content(line)
-        return {"status": "success", "response": response.to_dict()}
+        # 같은 텍스트를 동시에 요청하면 처음 요청의 결과를 같이 사용
+        words = compile_flight.do(hashlib.sha1(' '.join(line.split()).encode('utf-8')).hexdigest(), extract_words_with_ai, line)
+
+        # 기존 응답 형식(candidates[0].content.parts[0].text)도 유지
+        text = json.dumps(words, ensure_ascii=False)
+        return {
+            "status": "success",
+            "words": words,
+            "response": {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+        }
     except Exception as e:
         print(f"AI 처리 중 오류: {str(e)}")
         return {"error": f"AI 처리 중 오류 발생: {str(e)}"}
 
+# 텍스트에서 단어/뜻 목록 추출 (JSON 모드 + 응답 스키마, 실패하면 예외 발생)
+def extract_words_with_ai(line):
+    print("AI API 호출")
+    items = generate_json(model, line, {'type': 'array', 'items': COMPILE_WORD_SCHEMA})
+    if not isinstance(items, list):
+        raise ValueError("AI response is not a JSON array")
+
+    words = [item for item in items if matches(item, COMPILE_WORD_SCHEMA)]
+    # 뜻만 빠진 단어는 그 단어들의 뜻만 다시 요청
+    missing_meanings = [item['단어'] for item in items
+                        if isinstance(item, dict) and missing_fields(item, COMPILE_WORD_SCHEMA) == ['뜻']]
+    if missing_meanings:
+        print(f"뜻이 빠진 단어 재요청: {missing_meanings}")
+        found = generate_records(model, build_meaning_prompt, missing_meanings, '단어', COMPILE_WORD_SCHEMA, repair_rounds=0)
+        words += [found[normalize_key(word)] for word in missing_meanings if normalize_key(word) in found]
+    return words
+
 def extract_text_from_url(url):
     print(f"URL에서 텍스트 추출: {url}")
     try:
-        response = requests.get(url)
+        response = http_client.get(url)
         response.raise_for_status()
         
         soup = BeautifulSoup(response.text, 'lxml')
@@ -0,0 +1,162 @@
+import json
+import os
+import random
+import re
+import threading
+from collections import OrderedDict
+
+# 기본 영어/한국어 어휘 목록 (word, meaning, pos, band)
+LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lexicon.json')
+
+# 뜻 앞에 붙는 품사 약어/한국어 품사명을 공통 품사로 변환
+POS_ALIASES = {
+    'n': 'n', 'noun': 'n', '명사': 'n',
+    'v': 'v', 'vt': 'v', 'vi': 'v', 'verb': 'v', '동사': 'v',
+    'a': 'adj', 'adj': 'adj', 'adjective': 'adj', '형용사': 'adj',
+    'ad': 'adv', 'adv': 'adv', 'adverb': 'adv', '부사': 'adv',
+    'prep': 'prep', '전치사': 'prep',
+    'conj': 'conj', '접속사': 'conj',
+    'pron': 'pron', '대명사': 'pron',
+    'int': 'int', '감탄사': 'int',
+}
+POS_PREFIX_PATTERN = re.compile(r'^\s*\(?([A-Za-z]+|명사|동사|형용사|부사)\s*[.)]\s*')
+MEANING_SPLIT_PATTERN = re.compile(r'[,;/·\s]+')
+
+
+# 단어 길이 구간 (짧은 단어끼리, 긴 단어끼리 묶기 위함)
+def length_bucket(text):
+    length = len(text)
+    if length <= 4:
+        return 0
+    if length <= 7:
+        return 1
+    if length <= 10:
+        return 2
+    return 3
+
+
+# 뜻 문자열에서 품사 약어 분리 ('n. 사과' -> ('n', 'n.', '사과'))
+def split_pos_prefix(meaning):
+    match = POS_PREFIX_PATTERN.match(meaning)
+    if match:
+        pos = POS_ALIASES.get(match.group(1).lower())
+        if pos:
+            return pos, match.group(0).strip(), meaning[match.end():].strip()
+    return None, '', meaning.strip()
+
+
+# 한국어 뜻의 어미로 품사 추정
+def guess_pos(meaning):
+    meaning = meaning.strip()
+    if meaning.endswith(('게', '히')):
+        return 'adv'
+    if meaning.endswith(('한', '은', '는', '운', '인', '의')):
+        return 'adj'
+    if meaning.endswith('다'):
+        return 'v'
+    return 'n'
+
+
+# 뜻을 비교용 토큰 집합으로 변환 (유의어 오답 방지)
+def meaning_tokens(meaning):
+    return {token for token in MEANING_SPLIT_PATTERN.split(meaning.lower()) if token}
+
+
+class DistractorPool:
+    """LLM 호출 없이 로컬 어휘 풀에서 오답을 고르는 생성기.
+
+    어휘는 품사, 길이 구간, 빈도 구간으로 색인되고 같은 조건의 단어부터 후보로 사용한다.
+    """
+
+    def __init__(self, lexicon_path=LEXICON_PATH, max_observed=5000):
+        self.max_observed = max_observed
+        self._lock = threading.Lock()
+        self._lexicon = []
+        self._lexicon_by_word = {}
+        self._observed = OrderedDict()
+        self._index = None
+
+        try:
+            with open(lexicon_path, 'r', encoding='utf-8') as lexicon_file:
+                for item in json.load(lexicon_file):
+                    self._lexicon.append(self._make_entry(item['word'], item['meaning'], item.get('pos'), item.get('band', 2)))
+        except (OSError, ValueError) as e:
+            print(f"Error loading lexicon {lexicon_path}: {str(e)}")
+        self._lexicon_by_word = {entry['word'].lower(): entry for entry in self._lexicon}
+
+    def _make_entry(self, word, meaning, pos=None, band=2):
+        prefix_pos, _, plain_meaning = split_pos_prefix(meaning)
+        pos = POS_ALIASES.get(str(pos).lower()) if pos else None
+        pos = pos or prefix_pos or guess_pos(plain_meaning)
+        return {
+            'word': word.strip(),
+            'meaning': plain_meaning,
+            'pos': pos,
+            'band': band,
+            'word_bucket': length_bucket(word.strip()),
+            'meaning_bucket': length_bucket(plain_meaning),
+            'tokens': meaning_tokens(plain_meaning),
+        }
+
+    # 요청으로 들어온 단어(컴파일된 단어장 단어 포함)를 풀에 추가
+    def add_words(self, pairs):
+        with self._lock:
+            for word, meaning in pairs:
+                if not word or not meaning:
+                    continue
+                key = word.strip().lower()
+                self._observed.pop(key, None)
+                self._observed[key] = self._make_entry(word, meaning)
+                if len(self._observed) > self.max_observed:
+                    self._observed.popitem(last=False)
+            self._index = None
+
+    def _build_index(self):
+        # (품사, 빈도 구간, 길이 구간) -> 항목 목록
+        index = {'word': {}, 'meaning': {}}
+        observed = [entry for key, entry in self._observed.items() if key not in self._lexicon_by_word]
+        for entry in self._lexicon + observed:
+            index['word'].setdefault((entry['pos'], entry['band'], entry['word_bucket']), []).append(entry)
+            index['meaning'].setdefault((entry['pos'], entry['band'], entry['meaning_bucket']), []).append(entry)
+        return index
+
+    def pick(self, word, meaning, test_type, extra_pairs=(), count=3):
+        """정답과 다른 의미의 오답 count개를 반환 (부족하면 가능한 만큼)"""
+        known = self._lexicon_by_word.get(word.strip().lower(), {})
+        answer = self._make_entry(word, meaning, known.get('pos'), known.get('band', 2))
+        _, pos_label, _ = split_pos_prefix(meaning)
+        field = 'meaning' if test_type == 'meaning' else 'word'
+        bucket = answer[f'{field}_bucket']
+
+        with self._lock:
+            if self._index is None:
+                self._index = self._build_index()
+            index = self._index[field]
+
+        # 같은 요청의 다른 단어를 가장 먼저 사용하고, 이후 조건을 하나씩 완화
+        extra_entries = [self._make_entry(w, m) for w, m in extra_pairs]
+
+        def tiers():
+            yield [entry for entry in extra_entries if entry['pos'] == answer['pos']]
+            yield index.get((answer['pos'], answer['band'], bucket), [])
+            yield [entry for (pos, band, _), entries in index.items() if pos == answer['pos'] and band == answer['band'] for entry in entries]
+            yield [entry for (pos, _, _), entries in index.items() if pos == answer['pos'] for entry in entries]
+            yield extra_entries
+            yield [entry for entries in index.values() for entry in entries]
+
+        chosen = []
+        used = {answer[field].lower()}
+        for tier in tiers():
+            candidates = list(tier)
+            random.shuffle(candidates)
+            for candidate in candidates:
+                value = candidate[field]
+                if not value or value.lower() in used:
+                    continue
+                if candidate['word'].lower() == answer['word'].lower() or candidate['tokens'] & answer['tokens']:
+                    continue
+                used.add(value.lower())
+                chosen.append(f"{pos_label} {value}" if field == 'meaning' and pos_label else value)
+                if len(chosen) >= count:
+                    return chosen
+        return chosen
@@ -0,0 +1,189 @@
+import os
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# 기본 설정 (환경 변수로 조정 가능)
+HTTP_CONNECT_TIMEOUT = float(os.getenv('http_connect_timeout', 3.05))
+HTTP_READ_TIMEOUT = float(os.getenv('http_read_timeout', 10))
+HTTP_POOL_HOSTS = int(os.getenv('http_pool_hosts', 20))
+HTTP_POOL_MAXSIZE = int(os.getenv('http_pool_maxsize', 10))
+HTTP_MAX_RESPONSE_BYTES = int(os.getenv('http_max_response_bytes', 20 * 1024 * 1024))
+# 본문을 다 읽지 않고 끝낸 응답의 남은 부분이 이 크기 이하면 마저 읽어서 연결을 풀에 반환 (크면 연결 종료)
+HTTP_DRAIN_MAX_BYTES = int(os.getenv('http_drain_max_bytes', 256 * 1024))
+CHUNK_SIZE = 64 * 1024
+
+
+class ResponseTooLarge(Exception):
+    pass
+
+
+# 실제 TCP 연결 횟수를 세는 커넥션 풀 클래스
+# (끊긴 연결을 다시 여는 경우도 포함, urllib3의 num_connections는 새 연결 객체만 셈)
+def counting_pool(pool_cls, on_connect):
+    class CountingConnection(pool_cls.ConnectionCls):
+        def connect(self):
+            super().connect()
+            on_connect(self.host, self.port)
+
+    class CountingPool(pool_cls):
+        ConnectionCls = CountingConnection
+
+    return CountingPool
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    def __init__(self, on_connect, **kwargs):
+        self.on_connect = on_connect
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': counting_pool(HTTPConnectionPool, self.on_connect),
+            'https': counting_pool(HTTPSConnectionPool, self.on_connect),
+        }
+
+
+def host_label(host, port):
+    return host if port in (None, 80, 443) else f"{host}:{port}"
+
+
+class HttpClient:
+    """모든 서비스가 같이 쓰는 keep-alive HTTP 클라이언트.
+
+    호스트별 커넥션 풀을 재사용하고, 모든 요청에 connect/read timeout과
+    응답 크기 제한을 적용한다.
+    """
+
+    def __init__(self, connect_timeout=HTTP_CONNECT_TIMEOUT, read_timeout=HTTP_READ_TIMEOUT,
+                 pool_hosts=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_MAXSIZE,
+                 max_response_bytes=HTTP_MAX_RESPONSE_BYTES, drain_max_bytes=HTTP_DRAIN_MAX_BYTES):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_response_bytes = max_response_bytes
+        self.drain_max_bytes = drain_max_bytes
+
+        self._adapter = CountingHTTPAdapter(self._record_connect, pool_connections=pool_hosts,
+                                            pool_maxsize=pool_maxsize, max_retries=0)
+        self._session = requests.Session()
+        self._session.mount('http://', self._adapter)
+        self._session.mount('https://', self._adapter)
+        self._session.headers['User-Agent'] = 'VocaLab/1.0'
+
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'errors': 0, 'too_large': 0, 'bytes': 0, 'connections_opened': 0,
+                       'drained': 0, 'discarded': 0}
+        self._host_requests = {}
+        self._host_connects = {}
+
+    def _record_connect(self, host, port):
+        label = host_label(host, port)
+        with self._lock:
+            self._stats['connections_opened'] += 1
+            self._host_connects[label] = self._host_connects.get(label, 0) + 1
+
+    def _record(self, url, size=0, error=None):
+        parts = urlsplit(url)
+        host = host_label(parts.hostname, parts.port)
+        with self._lock:
+            self._stats['requests'] += 1
+            self._stats['bytes'] += size
+            if isinstance(error, ResponseTooLarge):
+                self._stats['too_large'] += 1
+            elif error is not None:
+                self._stats['errors'] += 1
+            self._host_requests[host] = self._host_requests.get(host, 0) + 1
+
+    def _check_length(self, response, max_bytes):
+        content_length = response.headers.get('Content-Length')
+        if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+            raise ResponseTooLarge(f"Response too large: {content_length} bytes (limit {max_bytes})")
+
+    @contextmanager
+    def stream(self, url, headers=None, timeout=None, max_bytes=None):
+        """응답 본문을 읽지 않은 채로 반환
+        (with 블록이 끝날 때 남은 본문이 짧으면 마저 읽어서 연결을 풀에 반환, 길거나 오류가 나면 연결 종료)"""
+        max_bytes = max_bytes or self.max_response_bytes
+        response = None
+        try:
+            response = self._session.get(url, headers=headers, timeout=timeout or self.timeout, stream=True)
+            self._check_length(response, max_bytes)
+            yield response
+            self._drain(response)
+            self._record(url)
+        except Exception as e:
+            self._record(url, error=e)
+            raise
+        finally:
+            if response is not None:
+                response.close()
+
+    def _drain(self, response):
+        # 이미 끝까지 읽은 응답은 그대로 반환 가능
+        if response._content_consumed:
+            return
+        content_length = response.headers.get('Content-Length')
+        if content_length and content_length.isdigit() and int(content_length) - response.raw.tell() > self.drain_max_bytes:
+            with self._lock:
+                self._stats['discarded'] += 1
+            return
+
+        size = 0
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            size += len(chunk)
+            if size > self.drain_max_bytes:
+                with self._lock:
+                    self._stats['discarded'] += 1
+                return
+        with self._lock:
+            self._stats['drained'] += 1
+            self._stats['bytes'] += size
+
+    def iter_content(self, response, max_bytes=None, chunk_size=CHUNK_SIZE):
+        """응답 본문을 조각 단위로 읽으면서 크기 제한 확인 (일부만 필요하면 chunk_size를 작게)"""
+        max_bytes = max_bytes or self.max_response_bytes
+        size = 0
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            size += len(chunk)
+            if size > max_bytes:
+                raise ResponseTooLarge(f"Response exceeded {max_bytes} bytes")
+            with self._lock:
+                self._stats['bytes'] += len(chunk)
+            yield chunk
+
+    def get(self, url, headers=None, timeout=None, max_bytes=None):
+        """본문 전체를 (크기 제한 안에서) 읽은 응답 반환"""
+        with self.stream(url, headers=headers, timeout=timeout, max_bytes=max_bytes) as response:
+            response._content = b''.join(self.iter_content(response, max_bytes))
+            response._content_consumed = True
+            return response
+
+    def download(self, url, file_path, timeout=None, max_bytes=None):
+        """파일로 저장 (크기 제한을 넘으면 저장 중인 파일 삭제)"""
+        with self.stream(url, timeout=timeout, max_bytes=max_bytes) as response:
+            response.raise_for_status()
+            try:
+                with open(file_path, 'wb') as file:
+                    for chunk in self.iter_content(response, max_bytes):
+                        file.write(chunk)
+            except ResponseTooLarge:
+                os.remove(file_path)
+                raise
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            # 호스트별 요청 수와 실제 TCP 연결 수 (연결 수가 요청 수보다 적을수록 keep-alive 재사용)
+            stats['hosts'] = {
+                host: {'requests': count, 'connections_opened': self._host_connects.get(host, 0)}
+                for host, count in self._host_requests.items()
+            }
+        return stats
+
+
+# 프로세스 전체에서 공유하는 클라이언트
+http_client = HttpClient()
@@ -0,0 +1,110 @@
+import atexit
+import json
+import os
+import threading
+
+# 로그 파일 위치
+LOG_DIR = os.getenv('log_dir', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs'))
+
+
+class LookupLog:
+    """요청 처리와 분리된 추가 전용 JSONL 로그.
+
+    append는 메모리 버퍼에 넣기만 하고, 백그라운드 스레드가 flush_interval마다
+    (또는 batch_size개가 쌓이면) 한 번에 파일 끝에 기록한다.
+    파일이 max_bytes를 넘으면 name.jsonl.1, .2 ... 순서로 backup_count개까지 보관한다.
+    """
+
+    def __init__(self, name, log_dir=LOG_DIR, max_bytes=10 * 1024 * 1024, backup_count=5,
+                 flush_interval=1.0, batch_size=200):
+        self.path = os.path.join(log_dir, f"{name}.jsonl")
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stats = {'appended': 0, 'written': 0, 'dropped': 0, 'rotations': 0}
+
+        os.makedirs(log_dir, exist_ok=True)
+        threading.Thread(target=self._run, daemon=True).start()
+        atexit.register(self.flush)
+
+    def append(self, record):
+        with self._lock:
+            self._buffer.append(record)
+            self._stats['appended'] += 1
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            records, self._buffer = self._buffer, []
+        if not records:
+            return
+
+        data = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records).encode('utf-8')
+        with self._write_lock:
+            try:
+                self._rotate_if_needed(len(data))
+                # O_APPEND 한 번의 write로 기록 (여러 워커 프로세스가 같은 파일에 써도 줄이 섞이지 않음)
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, data)
+                finally:
+                    os.close(fd)
+                with self._lock:
+                    self._stats['written'] += len(records)
+            except OSError as e:
+                print(f"Error writing log {self.path}: {str(e)}")
+                with self._lock:
+                    self._stats['dropped'] += len(records)
+
+    def _rotate_if_needed(self, incoming):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size + incoming <= self.max_bytes:
+            return
+
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        with self._lock:
+            self._stats['rotations'] += 1
+
+    # 보관 중인 기록을 오래된 파일부터 순서대로 반환 (깨진 줄은 건너뜀)
+    def replay(self):
+        self.flush()
+        paths = [f"{self.path}.{index}" for index in range(self.backup_count, 0, -1)] + [self.path]
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r', encoding='utf-8') as log_file:
+                for line in log_file:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['buffered'] = len(self._buffer)
+        return stats
@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# 실패한 호출을 기억하는 시간 (이 시간 동안 같은 키의 요청은 Gemini를 다시 호출하지 않고 같은 오류로 실패)
+NEGATIVE_TTL_SECONDS = float(os.getenv('single_flight_negative_ttl_seconds', 10))
+MAX_NEGATIVE_ITEMS = int(os.getenv('single_flight_max_negative_items', 1000))
+# 시간 초과 오류 클래스 이름 (TimeoutError, requests Timeout, google api_core DeadlineExceeded/GatewayTimeout)
+TIMEOUT_ERROR_NAMES = {'TimeoutError', 'Timeout', 'DeadlineExceeded', 'GatewayTimeout'}
+
+
+# 시간 초과/마감 시간 소진 오류 여부 (호출한 요청의 마감 시간 탓이므로 다른 요청에는 해당하지 않음)
+def is_timeout_error(e):
+    return any(cls.__name__ in TIMEOUT_ERROR_NAMES for cls in type(e).__mro__)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.remembered = False
+
+
+class SingleFlight:
+    """같은 키로 동시에 들어온 호출을 한 번의 실행으로 합치는 도우미.
+
+    처음 들어온 호출만 func를 실행하고, 실행 중에 같은 키로 들어온 호출은
+    그 결과(또는 예외)를 기다렸다가 그대로 받는다.
+    실제 실패(Gemini 오류 등)는 negative_ttl_seconds 동안 기억해서 바로 같은 예외를 발생시키고,
+    시간 초과는 기억하지 않으며 기다리던 호출은 각자 다시 실행한다.
+    """
+
+    def __init__(self, name, negative_ttl_seconds=NEGATIVE_TTL_SECONDS, max_negative_items=MAX_NEGATIVE_ITEMS):
+        self.name = name
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_negative_items = max_negative_items
+
+        self._calls = {}
+        self._failures = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'coalesced': 0, 'failures': 0, 'timeouts': 0, 'negative_hits': 0}
+
+    # 기억 중인 실패 (만료되었으면 삭제하고 None, _lock 안에서 호출)
+    def _recent_failure(self, key):
+        failure = self._failures.get(key)
+        if failure is not None and time.time() >= failure[1]:
+            del self._failures[key]
+            return None
+        return failure
+
+    def recently_failed(self, key):
+        with self._lock:
+            return self._recent_failure(key) is not None
+
+    def do(self, key, func, *args, **kwargs):
+        while True:
+            with self._lock:
+                failure = self._recent_failure(key)
+                if failure is not None:
+                    self._stats['negative_hits'] += 1
+                    raise failure[0]
+
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+                    self._stats['calls'] += 1
+                else:
+                    self._stats['coalesced'] += 1
+
+            if leader:
+                return self._run(key, call, func, *args, **kwargs)
+
+            call.done.wait()
+            if call.error is None:
+                return call.result
+            if call.remembered:
+                raise call.error
+            # 먼저 실행한 호출이 자기 마감 시간 때문에 실패했으면 이 호출의 마감 시간으로 다시 실행
+
+    def _run(self, key, call, func, *args, **kwargs):
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            with self._lock:
+                if is_timeout_error(e):
+                    self._stats['timeouts'] += 1
+                else:
+                    self._stats['failures'] += 1
+                    if self.negative_ttl_seconds > 0:
+                        call.remembered = True
+                        self._failures[key] = (e, time.time() + self.negative_ttl_seconds)
+                        self._failures.move_to_end(key)
+                        while len(self._failures) > self.max_negative_items:
+                            self._failures.popitem(last=False)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls)
+            now = time.time()
+            stats['negative_items'] = sum(1 for _, expires_at in self._failures.values() if expires_at > now)
+        return stats
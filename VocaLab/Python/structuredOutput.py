@@ -0,0 +1,135 @@
+import json
+
+import google.generativeai as genai
+
+# 더 빠른 JSON 파서가 설치되어 있으면 사용
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 스키마 타입 이름 -> Gemini 스키마 타입
+GEMINI_TYPES = {
+    'object': 'OBJECT', 'array': 'ARRAY', 'string': 'STRING',
+    'integer': 'INTEGER', 'number': 'NUMBER', 'boolean': 'BOOLEAN',
+}
+
+
+def loads(text):
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+# 스키마를 Gemini response_schema 형식으로 변환 (로컬 검증용 minItems는 제외)
+def to_gemini_schema(schema):
+    converted = {'type': GEMINI_TYPES[schema['type']]}
+    if 'properties' in schema:
+        converted['properties'] = {name: to_gemini_schema(field) for name, field in schema['properties'].items()}
+    if 'required' in schema:
+        converted['required'] = list(schema['required'])
+    if 'items' in schema:
+        converted['items'] = to_gemini_schema(schema['items'])
+    return converted
+
+
+# 값이 스키마에 맞는지 확인 (빈 문자열은 빠진 값으로 취급)
+def matches(value, schema):
+    kind = schema['type']
+    if kind == 'string':
+        return isinstance(value, str) and bool(value.strip())
+    if kind == 'integer':
+        return isinstance(value, int) and not isinstance(value, bool)
+    if kind == 'number':
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if kind == 'boolean':
+        return isinstance(value, bool)
+    if kind == 'array':
+        return (isinstance(value, list) and len(value) >= schema.get('minItems', 0)
+                and all(matches(item, schema['items']) for item in value))
+    if kind == 'object':
+        return isinstance(value, dict) and not missing_fields(value, schema)
+    return False
+
+
+# 객체에서 빠졌거나 형식이 잘못된 필수 필드 목록
+def missing_fields(record, schema):
+    required = schema.get('required', [])
+    if not isinstance(record, dict):
+        return list(required)
+    return [field for field in required if not matches(record.get(field), schema['properties'][field])]
+
+
+# 키 비교용 정규화 (대소문자, 앞뒤/중복 공백 무시)
+def normalize_key(key):
+    return ' '.join(str(key).split()).lower()
+
+
+# JSON 모드 + 응답 스키마로 Gemini 호출 후 파싱한 값 반환 (파싱 실패 시 ValueError)
+def generate_json(model, prompt, schema, request_options=None):
+    response = model.generate_content(
+        prompt,
+        generation_config=genai.GenerationConfig(
+            response_mime_type='application/json',
+            response_schema=to_gemini_schema(schema)
+        ),
+        request_options=request_options
+    )
+    return loads(response.text)
+
+
+# 객체 1개 생성 (필드가 빠지면 그 필드만 다시 요청, 끝까지 빠지면 ValueError)
+def generate_record(model, prompt, schema, request_options=None, repair_rounds=1):
+    record = generate_json(model, prompt, schema, request_options)
+    if not isinstance(record, dict):
+        raise ValueError("AI response is not a JSON object")
+
+    for _ in range(repair_rounds):
+        missing = missing_fields(record, schema)
+        if not missing:
+            break
+        print(f"Re-asking for missing fields: {missing}")
+        partial_schema = {
+            'type': 'object',
+            'properties': {field: schema['properties'][field] for field in missing},
+            'required': missing
+        }
+        repair_prompt = (
+            f"{prompt}\n\n이전 응답: {json.dumps(record, ensure_ascii=False)}\n"
+            f"이전 응답에서 빠졌거나 형식이 잘못된 {', '.join(missing)} 필드만 다시 보내시오."
+        )
+        patch = generate_json(model, repair_prompt, partial_schema, request_options)
+        if isinstance(patch, dict):
+            record.update({field: patch[field] for field in missing if field in patch})
+
+    missing = missing_fields(record, schema)
+    if missing:
+        raise ValueError(f"AI response is missing fields: {', '.join(missing)}")
+    return record
+
+
+# 키(단어 등)마다 객체 1개씩 배열로 생성
+# 응답에 없거나 필드가 빠진 키만 모아 다시 요청하고, 정규화한 키 -> 객체로 반환
+# build_prompt(keys)는 해당 키 목록에 대한 프롬프트를 반환
+def generate_records(model, build_prompt, keys, key_field, item_schema, request_options=None,
+                     repair_rounds=1, normalize=normalize_key):
+    found = {}
+    pending = list(dict.fromkeys(keys))
+    for attempt in range(1 + repair_rounds):
+        if not pending:
+            break
+        try:
+            items = generate_json(model, build_prompt(pending), {'type': 'array', 'items': item_schema}, request_options)
+        except Exception:
+            if attempt == 0:
+                raise
+            break
+
+        wanted = {normalize(key): key for key in pending}
+        for item in items if isinstance(items, list) else []:
+            if isinstance(item, dict) and matches(item, item_schema) and normalize(item[key_field]) in wanted:
+                found[normalize(item[key_field])] = item
+        pending = [key for key in pending if normalize(key) not in found]
+        if pending and attempt < repair_rounds:
+            print(f"Re-asking for {len(pending)} missing items")
+    return found
@@ -1,16 +1,31 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 import random
 import google.generativeai as genai
-import requests
-from bs4 import BeautifulSoup
+from google.api_core import exceptions as google_exceptions
+from httpClient import http_client
+import xml.etree.ElementTree as ET
 import json
+import html
+import re
 import os 
 from dotenv import load_dotenv
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 import time
+import threading
+import hashlib
+import inspect
+from urllib.parse import quote_plus, urlsplit, urlunsplit, parse_qsl, urlencode
+import uuid
+from collections import OrderedDict, Counter, deque
 from functools import wraps
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed, wait
+from distractorPool import DistractorPool
+from cacheStore import TwoTierCache
+from wordCoverage import WordCoverage
+from structuredOutput import generate_json, generate_record, generate_records, matches, normalize_key
+from singleFlight import SingleFlight
 
 # Flask 앱 초기화
 app = Flask(__name__)
@@ -22,26 +37,86 @@ limiter = Limiter(
     key_func=get_remote_address,
     default_limits=["200 per day", "50 per hour"]
 )
+# 작업 상태 조회(폴링) 제한 (Spring 서버가 한 IP로 모든 사용자의 폴링을 전달하므로 기본 제한보다 넉넉하게)
+STATUS_POLL_LIMIT = os.getenv('status_poll_limit', "600 per minute")
+
+# 요청 단위 마감 시간과 재시도 예산
+# 한 요청 안의 모든 재시도(데코레이터 재시도 + 엔드포인트 재시도)가 같은 예산을 나눠 씀
+class Deadline:
+    def __init__(self, seconds, retry_budget):
+        self.expires_at = time.time() + seconds
+        self.retry_budget = retry_budget
+        self._lock = threading.Lock()
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.time())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    # wait초 대기 후 재시도할 시간과 예산이 남아 있으면 예산 1회 차감 후 True
+    def allow_retry(self, wait=0):
+        with self._lock:
+            if self.retry_budget <= 0 or self.remaining() <= wait:
+                return False
+            self.retry_budget -= 1
+            return True
+
+# 마감 시간/재시도 예산이 남지 않아 재시도를 멈춘 오류
+# (요청마다 마감 시간이 다르므로 llm_flight는 이 오류를 실패로 기억하지 않음)
+class DeadlineExhausted(TimeoutError):
+    pass
+
+# Gemini 호출 옵션 (마감 시간이 있으면 남은 시간을 호출 timeout으로 사용)
+def gemini_request_options(deadline):
+    if deadline is None:
+        return None
+    return {'timeout': max(1.0, deadline.remaining())}
 
 # 재시도 데코레이터
-def retry_on_error(max_retries=3, delay=1):
+# 호출 시 deadline 인자를 넘기면 마감 시간/재시도 예산 안에서만 재시도
+# gemini=True인 Gemini 호출만 할당량 초과 시 재시도 없이 Gemini를 잠시 끔 (뉴스 RSS의 429 등은 일반 재시도)
+def retry_on_error(max_retries=3, delay=1, gemini=False):
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
+            deadline = kwargs.get('deadline')
             retries = 0
             while retries < max_retries:
                 try:
                     return func(*args, **kwargs)
                 except Exception as e:
+                    # 할당량 초과는 재시도해도 실패하므로 바로 전달
+                    if gemini and is_quota_error(e):
+                        mark_gemini_unavailable(e)
+                        raise e
                     print(f"Retry {retries + 1}/{max_retries} due to error: {str(e)}")
                     retries += 1
                     if retries == max_retries:
                         raise e
+                    if deadline is not None and not deadline.allow_retry(delay * retries):
+                        print(f"Retry budget exhausted: {str(e)}")
+                        raise DeadlineExhausted(f"Retry budget exhausted: {str(e)}") from e
                     time.sleep(delay * retries)
             return func(*args, **kwargs)
         return wrapper
     return decorator
 
+# Gemini 할당량 초과(429) 오류 여부 (google api_core 예외 타입으로만 판단)
+def is_quota_error(e):
+    return isinstance(e, (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests))
+
+# 할당량 초과 이후 일정 시간 동안 Gemini 호출을 건너뛰기 위한 시각
+gemini_unavailable_until = 0
+
+def mark_gemini_unavailable(e):
+    global gemini_unavailable_until
+    print(f"Gemini quota exhausted, skipping Gemini for {GEMINI_COOLDOWN_SECONDS}s: {str(e)}")
+    gemini_unavailable_until = time.time() + GEMINI_COOLDOWN_SECONDS
+
+def gemini_available():
+    return time.time() >= gemini_unavailable_until
+
 # 환경 변수 로드
 load_dotenv('env/api.env')
 
@@ -53,55 +128,393 @@ print(f"Loaded API Key: {apiKey}")
 genai.configure(api_key=apiKey)
 model = genai.GenerativeModel('gemini-1.5-flash')
 
+# 뉴스 RSS 캐시 설정 (TTL 안에서는 캐시 사용, TTL~최대 보관 시간 사이는 캐시 반환 후 백그라운드 재검증)
+NEWS_ARTICLE_LIMIT = 3
+# RSS는 앞부분 기사만 필요하므로 작은 조각으로 읽음 (남은 본문은 http_client가 짧으면 마저 읽어 연결 재사용)
+NEWS_FEED_CHUNK_SIZE = 8 * 1024
+NEWS_FEED_TTL_SECONDS = int(os.getenv('news_feed_ttl_seconds', 600))
+NEWS_FEED_MAX_STALE_SECONDS = int(os.getenv('news_feed_max_stale_seconds', 24 * 3600))
+NEWS_FEED_CACHE_SIZE = int(os.getenv('news_feed_cache_size', 1000))
+# 키워드 -> 파싱된 기사 목록, ETag, Last-Modified, 받은 시각
+news_feed_cache = OrderedDict()
+news_feed_refreshing = set()
+news_feed_lock = threading.Lock()
+feed_refresh_executor = ThreadPoolExecutor(max_workers=int(os.getenv('news_feed_refresh_workers', 2)))
+
+# 뉴스 검색어 확장 방식 (none: 단어 그대로, synonyms: 유의어 표, llm: Gemini 확장)
+NEWS_QUERY_EXPANSIONS = ['none', 'synonyms', 'llm']
+SYNONYMS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'synonyms.json')
+
+# 기사 요약 동시 실행 설정 (기사별 제한 시간, 기사별 재시도 횟수)
+NEWS_SUMMARY_TIMEOUT_SECONDS = float(os.getenv('news_summary_timeout_seconds', 12))
+NEWS_SUMMARY_RETRY_BUDGET = int(os.getenv('news_summary_retry_budget', 2))
+# RSS 기사 설명에 붙는 출처 표시(<font>)와 HTML 태그
+NEWS_SOURCE_PATTERN = re.compile(r'<font[^>]*>.*?</font>', re.IGNORECASE | re.DOTALL)
+HTML_TAG_PATTERN = re.compile(r'<[^>]+>')
+HANGUL_PATTERN = re.compile('[\u3131-\u318e\uac00-\ud7a3]')
+# 기사 URL 정규화 시 제거할 추적용 파라미터
+NEWS_URL_TRACKING_PARAMS = {'oc', 'hl', 'gl', 'ceid', 'fbclid', 'gclid'}
+summary_executor = ThreadPoolExecutor(max_workers=int(os.getenv('news_summary_workers', 6)))
+
+# 자주 요청되는 단어의 뉴스/요약을 미리 받아 두는 백그라운드 작업 설정
+# (주기마다 상위 N개 단어 처리, 미리 받기에 쓰는 Gemini 호출은 시간당 예산 안에서만 사용)
+NEWS_PREFETCH_ENABLED = os.getenv('news_prefetch_enabled', 'true').lower() == 'true'
+NEWS_PREFETCH_TOP_N = int(os.getenv('news_prefetch_top_n', 20))
+NEWS_PREFETCH_INTERVAL_SECONDS = int(os.getenv('news_prefetch_interval_seconds', 300))
+NEWS_PREFETCH_GEMINI_BUDGET_PER_HOUR = int(os.getenv('news_prefetch_gemini_budget_per_hour', 60))
+# 처리 중인 사용자 요청이 이 수 이상이면 미리 받기를 다음 주기로 미룸
+NEWS_PREFETCH_MAX_LIVE_REQUESTS = int(os.getenv('news_prefetch_max_live_requests', 2))
+# 주기마다 단어 요청 횟수에 곱하는 감쇠 비율 (최근에 많이 요청된 단어 우선)
+HOT_WORD_DECAY = 0.5
+MAX_HOT_WORDS = 10000
+hot_words = Counter()
+hot_words_lock = threading.Lock()
+live_requests = 0
+prefetch_gemini_calls = deque()
+prefetch_stats = {'runs': 0, 'words': 0, 'feeds_refreshed': 0, 'summaries': 0, 'skipped_budget': 0, 'skipped_busy': 0}
+
+# 테스트 오답 생성 시 동시에 실행할 최대 Gemini 호출 수
+TEST_MAX_WORKERS = int(os.getenv('test_max_workers', 8))
+
+# 오답 생성 방식 (batch: 단어 목록 전체를 한 번에 요청, per_word: 단어별 요청, local: LLM 없이 로컬 어휘 풀 사용)
+DISTRACTOR_MODES = ['batch', 'per_word', 'local']
+# 배치 응답에서 빠진 단어를 다시 요청하는 횟수
+BATCH_FOLLOWUP_ROUNDS = int(os.getenv('batch_followup_rounds', 1))
+# Gemini 오답 생성이 이 시간(초)을 넘기면 남은 단어는 로컬 어휘 풀로 처리
+GEMINI_SLOW_SECONDS = float(os.getenv('gemini_slow_seconds', 15))
+# 문제 생성 요청 1건의 최대 처리 시간(초)과 요청 전체에서 허용하는 재시도 횟수
+TEST_DEADLINE_SECONDS = float(os.getenv('test_deadline_seconds', 25))
+TEST_RETRY_BUDGET = int(os.getenv('test_retry_budget', 10))
+# 소설 생성 Gemini 호출 제한 시간(초)
+NOVEL_TIMEOUT_SECONDS = float(os.getenv('novel_timeout_seconds', 120))
+# 단어가 많은 소설을 여러 장으로 나눠 동시에 생성할 때 장당 단어 수와 동시 생성 수
+# (요청의 chapter_size는 NOVEL_CHAPTER_MIN_SIZE 이상, 장 수가 NOVEL_MAX_CHAPTERS를 넘으면 한 번에 생성)
+NOVEL_MODES = ['single', 'chapters']
+NOVEL_CHAPTER_SIZE = int(os.getenv('novel_chapter_size', 8))
+NOVEL_CHAPTER_MIN_SIZE = int(os.getenv('novel_chapter_min_size', 4))
+NOVEL_MAX_CHAPTERS = int(os.getenv('novel_max_chapters', 8))
+NOVEL_CHAPTER_WORKERS = int(os.getenv('novel_chapter_workers', 4))
+# 할당량 초과 시 로컬 어휘 풀만 사용하는 시간(초)
+GEMINI_COOLDOWN_SECONDS = int(os.getenv('gemini_cooldown_seconds', 60))
+
+# Gemini JSON 응답 스키마
+STRING_LIST_SCHEMA = {'type': 'array', 'items': {'type': 'string'}}
+NEWS_QUERY_SCHEMA = {'type': 'object', 'properties': {'terms': STRING_LIST_SCHEMA}, 'required': ['terms']}
+NEWS_SUMMARY_ITEM_SCHEMA = {
+    'type': 'object',
+    'properties': {'id': {'type': 'integer'}, 'summary': {'type': 'string'}},
+    'required': ['id', 'summary']
+}
+WRONG_ANSWERS_SCHEMA = {
+    'type': 'object',
+    'properties': {'wrong_answers': {'type': 'array', 'items': {'type': 'string'}, 'minItems': 3}},
+    'required': ['wrong_answers']
+}
+WRONG_ANSWERS_BATCH_SCHEMA = {
+    'type': 'array',
+    'items': {
+        'type': 'object',
+        'properties': {'answer': {'type': 'string'}, 'wrong_answers': {'type': 'array', 'items': {'type': 'string'}, 'minItems': 3}},
+        'required': ['answer', 'wrong_answers']
+    }
+}
+STORY_OUTLINE_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'title': {'type': 'string'},
+        'title_ko': {'type': 'string'},
+        'characters': {'type': 'string'},
+        'chapters': STRING_LIST_SCHEMA
+    },
+    'required': ['title', 'title_ko', 'characters', 'chapters']
+}
+STORY_SENTENCE_SCHEMA = {
+    'type': 'object',
+    'properties': {'sentence': {'type': 'string'}, 'translation': {'type': 'string'}},
+    'required': ['sentence', 'translation']
+}
+STORY_CHAPTER_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'story': {'type': 'string'},
+        'translation': {'type': 'string'},
+        'words': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'word': {'type': 'string'},
+                    'meaning': {'type': 'string'},
+                    'sentences': {'type': 'array', 'items': STORY_SENTENCE_SCHEMA}
+                },
+                'required': ['word', 'sentences']
+            }
+        }
+    },
+    'required': ['story', 'translation', 'words']
+}
+STORY_REPAIR_ITEM_SCHEMA = {
+    'type': 'object',
+    'properties': {'word': {'type': 'string'}, 'sentence': {'type': 'string'}, 'translation': {'type': 'string'}},
+    'required': ['word', 'sentence', 'translation']
+}
+
+# 같은 입력으로 동시에 들어온 Gemini 호출을 1번으로 합치고, 실패는 잠시 기억 (같은 단어장을 여러 명이 동시에 쓰는 경우)
+llm_flight = SingleFlight('total_api')
+
+# 로컬 오답 생성용 어휘 풀 (기본 어휘 + 요청으로 들어온 단어)
+distractor_pool = DistractorPool()
+
+# 미리 생성해 둔 문제 은행 ((단어, test_type) -> 뜻, 오답 3개)
+question_bank = TwoTierCache(
+    'question_bank',
+    max_memory_items=int(os.getenv('question_bank_memory_items', 5000)),
+    ttl_seconds=int(os.getenv('question_bank_ttl_seconds', 90 * 24 * 3600)),
+    max_disk_items=int(os.getenv('question_bank_disk_items', 500000))
+)
+# 문제 은행 백그라운드 생성 작업 (요청 처리와 별도 스레드에서 실행)
+# (대기 중이거나 실행 중인 작업은 QUESTION_BANK_WORKERS + QUESTION_BANK_QUEUE_SIZE개까지, 끝난 작업은 MAX_BANK_JOBS개까지 보관)
+QUESTION_BANK_WORKERS = int(os.getenv('question_bank_workers', 1))
+QUESTION_BANK_QUEUE_SIZE = int(os.getenv('question_bank_queue_size', 10))
+bank_executor = ThreadPoolExecutor(max_workers=QUESTION_BANK_WORKERS)
+bank_jobs = OrderedDict()
+bank_jobs_lock = threading.Lock()
+MAX_BANK_JOBS = 100
+
+# Gemini로 확장한 뉴스 검색어 캐시 (단어 -> 관련 검색어)
+news_query_cache = TwoTierCache(
+    'news_query',
+    max_memory_items=int(os.getenv('news_query_cache_memory_items', 2000)),
+    ttl_seconds=int(os.getenv('news_query_cache_ttl_seconds', 30 * 24 * 3600)),
+    max_disk_items=int(os.getenv('news_query_cache_disk_items', 50000))
+)
+
+# 기사 요약 캐시 (기사 URL 해시 -> 한글 요약, 어떤 단어로 찾은 기사든 공유)
+summary_cache = TwoTierCache(
+    'news_summary',
+    max_memory_items=int(os.getenv('news_summary_cache_memory_items', 2000)),
+    ttl_seconds=int(os.getenv('news_summary_cache_ttl_seconds', 14 * 24 * 3600)),
+    max_disk_items=int(os.getenv('news_summary_cache_disk_items', 50000))
+)
+
+# Gemini가 만든 오답 캐시 ((정답, test_type) -> 오답 3개)
+distractor_cache = TwoTierCache(
+    'distractors',
+    max_memory_items=int(os.getenv('distractor_cache_memory_items', 2000)),
+    ttl_seconds=int(os.getenv('distractor_cache_ttl_seconds', 30 * 24 * 3600)),
+    max_disk_items=int(os.getenv('distractor_cache_disk_items', 100000))
+)
+
+# 생성한 소설 캐시 (정렬한 단어/뜻 목록 -> 최근 NOVEL_CACHE_VARIANTS개 이야기)
+NOVEL_CACHE_VARIANTS = int(os.getenv('novel_cache_variants', 5))
+novel_cache = TwoTierCache(
+    'novels',
+    max_memory_items=int(os.getenv('novel_cache_memory_items', 500)),
+    ttl_seconds=int(os.getenv('novel_cache_ttl_seconds', 30 * 24 * 3600)),
+    max_disk_items=int(os.getenv('novel_cache_disk_items', 20000))
+)
+novel_cache_lock = threading.Lock()
+# 캐시된 이야기를 반환한 뒤 부족한 이야기를 채우는 백그라운드 생성 작업
+novel_executor = ThreadPoolExecutor(max_workers=int(os.getenv('novel_refill_workers', 1)))
+novel_refilling = set()
+chapter_executor = ThreadPoolExecutor(max_workers=NOVEL_CHAPTER_WORKERS)
+
+# 오래 걸리는 생성 요청(소설, 테스트)의 비동기 작업 설정
+# (작업자 수, 대기열 최대 길이, 끝난 작업 결과 보관 시간)
+JOB_WORKERS = int(os.getenv('job_workers', 2))
+JOB_QUEUE_SIZE = int(os.getenv('job_queue_size', 20))
+JOB_RESULT_TTL_SECONDS = int(os.getenv('job_result_ttl_seconds', 600))
+job_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS)
+jobs = OrderedDict()
+MAX_JOBS = 1000
+jobs_lock = threading.Lock()
+
 # 건강 체크 엔드포인트
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({'status': 'ok'})
 
-# 뉴스 검색 함수
+# 캐시 적중/실패 통계 엔드포인트
+@app.route('/Python/cache-stats', methods=['GET'])
+def cache_stats():
+    return jsonify({
+        'distractors': distractor_cache.stats(),
+        'news_query': news_query_cache.stats(),
+        'news_summary': summary_cache.stats(),
+        'novels': novel_cache.stats(),
+        'http': http_client.stats(),
+        'news_prefetch': news_prefetch_stats(),
+        'question_bank': question_bank.stats(),
+        'single_flight': llm_flight.stats()
+    })
+
+# RSS 응답에서 기사 목록 추출
+# RSS 본문을 조각 단위로 파싱해서 limit개의 item만 추출
+# (limit개를 채우면 나머지 피드는 파싱하지 않음)
+def parse_news_items(chunks, limit=NEWS_ARTICLE_LIMIT):
+    parser = ET.XMLPullParser(events=('end',))
+    news_articles = []
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, element in parser.read_events():
+            if element.tag != 'item':
+                continue
+            news_articles.append({
+                'title': element.findtext('title', default=''),
+                'url': element.findtext('link', default=''),
+                'description': element.findtext('description') or "설명 없음"
+            })
+            element.clear()
+            if len(news_articles) >= limit:
+                return news_articles
+    return news_articles
+
+# Google News RSS 요청 (캐시된 ETag/Last-Modified가 있으면 조건부 요청)
+# 304 응답이면 articles는 None
 @retry_on_error(max_retries=3, delay=1)
-def search_news(keyword):
+def fetch_news_feed(keyword, etag=None, last_modified=None):
     try:
-        url = f"https://news.google.com/rss/search?q={keyword}&hl=en-US&gl=US&ceid=US:en"
-        response = requests.get(url)
-        soup = BeautifulSoup(response.content, 'xml')
-        items = soup.find_all('item', limit=3)
-        
-        news_articles = []
-        for item in items:
-            article = {
-                'title': item.title.text,
-                'url': item.link.text,
-                'description': item.description.text if item.description else "설명 없음"
-            }
-            news_articles.append(article)
-        return news_articles
+        url = f"https://news.google.com/rss/search?q={quote_plus(keyword)}&hl=en-US&gl=US&ceid=US:en"
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+        # limit개를 채우면 파싱을 멈추고, with 블록을 벗어날 때 남은 본문은 http_client가 처리
+        with http_client.stream(url, headers=headers) as response:
+            if response.status_code == 304:
+                return None, etag, last_modified
+            response.raise_for_status()
+
+            return (
+                parse_news_items(http_client.iter_content(response, chunk_size=NEWS_FEED_CHUNK_SIZE)),
+                response.headers.get('ETag'),
+                response.headers.get('Last-Modified')
+            )
     except Exception as e:
-        print(f"Error in search_news: {str(e)}")
+        print(f"Error in fetch_news_feed: {str(e)}")
         raise
 
-# 뉴스 컨텍스트 생성
-@retry_on_error(max_retries=3, delay=1)
-def generate_news_context(word):
+# 피드를 새로 받아서 캐시에 저장 (변경 없음(304)이면 시각만 갱신)
+def refresh_news_feed(cache_key, keyword):
+    with news_feed_lock:
+        entry = news_feed_cache.get(cache_key)
+    etag = entry['etag'] if entry else None
+    last_modified = entry['last_modified'] if entry else None
+
+    try:
+        articles, etag, last_modified = fetch_news_feed(keyword, etag, last_modified)
+        with news_feed_lock:
+            if articles is None and entry is not None:
+                articles = entry['articles']
+            news_feed_cache[cache_key] = {
+                'articles': articles or [],
+                'etag': etag,
+                'last_modified': last_modified,
+                'fetched_at': time.time()
+            }
+            news_feed_cache.move_to_end(cache_key)
+            while len(news_feed_cache) > NEWS_FEED_CACHE_SIZE:
+                news_feed_cache.popitem(last=False)
+        return articles or []
+    finally:
+        with news_feed_lock:
+            news_feed_refreshing.discard(cache_key)
+
+# 백그라운드 재검증 (실패해도 기존 캐시를 계속 사용)
+def refresh_news_feed_in_background(cache_key, keyword):
+    try:
+        refresh_news_feed(cache_key, keyword)
+    except Exception as e:
+        print(f"Error refreshing news feed for {keyword}: {str(e)}")
+
+# 뉴스 검색 함수
+# TTL 안의 캐시는 그대로, TTL이 지난 캐시는 먼저 반환하고 백그라운드에서 재검증
+def search_news(keyword):
+    keyword = ' '.join(keyword.split())
+    cache_key = keyword.lower()
+    now = time.time()
+    with news_feed_lock:
+        entry = news_feed_cache.get(cache_key)
+        if entry is not None:
+            news_feed_cache.move_to_end(cache_key)
+            age = now - entry['fetched_at']
+            if age > NEWS_FEED_TTL_SECONDS and age <= NEWS_FEED_MAX_STALE_SECONDS and cache_key not in news_feed_refreshing:
+                news_feed_refreshing.add(cache_key)
+                feed_refresh_executor.submit(refresh_news_feed_in_background, cache_key, keyword)
+            if age <= NEWS_FEED_MAX_STALE_SECONDS:
+                return [dict(article) for article in entry['articles']]
+
+    # 캐시가 없거나 너무 오래된 경우 직접 요청
+    return [dict(article) for article in refresh_news_feed(cache_key, keyword)]
+
+# 뉴스 검색어 유의어 표 로드
+def load_news_synonyms(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as synonyms_file:
+            return {key.lower(): value for key, value in json.load(synonyms_file).items()}
+    except (OSError, ValueError) as e:
+        print(f"Error loading synonyms {path}: {str(e)}")
+        return {}
+
+news_synonyms = load_news_synonyms(SYNONYMS_PATH)
+
+# 검색어 정규화 (공백 정리, 앞뒤 따옴표/문장부호 제거)
+def normalize_news_keyword(word):
+    return ' '.join(str(word).split()).strip(' "\'.,;:!?')
+
+# 여러 단어로 된 구는 따옴표로 묶어서 정확히 일치하는 기사만 검색
+def quote_news_term(term):
+    return f'"{term}"' if ' ' in term else term
+
+# Gemini로 관련 검색어 확장 (검색어 최대 3개 반환)
+@retry_on_error(max_retries=3, delay=1, gemini=True)
+def expand_news_query_with_ai(keyword):
     try:
         prompt = f"""
-        Given the exact word "{word}", create a search phrase that will find news articles directly related to this specific word.
+        Given the exact word "{keyword}", list up to 3 closely related search terms that will find news articles about this specific word.
         Requirements:
-        1. The search phrase MUST find articles about this EXACT word/concept
-        2. DO NOT change or replace the original word
-        3. Focus on current events and news specifically about "{word}"
+        1. Each term MUST be about this EXACT word/concept
+        2. Focus on current events and news specifically about "{keyword}"
 
-        Return only the exact word "{word}" as the search phrase, no additional context or explanation.
+        Return the search terms in the "terms" array.
         """
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        terms = generate_record(model, prompt, NEWS_QUERY_SCHEMA)['terms']
+        return [normalize_news_keyword(term) for term in terms][:3]
     except Exception as e:
-        print(f"Error in generate_news_context: {str(e)}")
+        print(f"Error in expand_news_query_with_ai: {str(e)}")
         raise
 
-# 뉴스 한글 요약 함수
-@retry_on_error(max_retries=3, delay=1)
-def summarize_news_in_korean(text):
+# Gemini 확장 검색어를 만들어 캐시에 저장 (같은 단어의 동시 요청은 llm_flight로 1번만 실행)
+def expand_and_cache_news_query(keyword):
+    expanded = expand_news_query_with_ai(keyword)
+    news_query_cache.set(keyword.lower(), expanded)
+    return expanded
+
+# 뉴스 검색어 생성 (LLM 호출 없이 로컬에서 생성, expansion='llm'일 때만 Gemini 확장 사용)
+def build_news_query(word, expansion='none'):
+    keyword = normalize_news_keyword(word)
+    terms = [keyword]
+
+    if expansion == 'synonyms':
+        terms += news_synonyms.get(keyword.lower(), [])
+    elif expansion == 'llm':
+        expanded = news_query_cache.get(keyword.lower())
+        if expanded is None:
+            try:
+                expanded = llm_flight.do(f"news_query:{keyword.lower()}", expand_and_cache_news_query, keyword)
+            except Exception as e:
+                print(f"Query expansion failed, using the word only: {str(e)}")
+                expanded = []
+        terms += expanded
+
+    unique_terms = list(dict.fromkeys(term for term in terms if term))
+    return ' OR '.join(quote_news_term(term) for term in unique_terms)
+
+# 뉴스 한글 요약 함수 (실패하면 예외를 그대로 전달해 재시도)
+@retry_on_error(max_retries=3, delay=1, gemini=True)
+def summarize_news_in_korean(text, deadline=None):
     try:
         prompt = f"""
         Summarize the following news article in Korean in 4-5 sentences:
@@ -115,26 +528,290 @@ def summarize_news_in_korean(text):
         4. Return only the summary, no additional text
         """
         
-        response = model.generate_content(prompt)
+        response = model.generate_content(prompt, request_options=gemini_request_options(deadline))
         return response.text.strip()
     except Exception as e:
         print(f"Error in summarize_news: {str(e)}")
-        return "요약을 생성할 수 없습니다."
+        raise
 
-# 오답 생성 함수
-@retry_on_error(max_retries=3, delay=1)
-def generate_wrong_answers(prompt):
+# 기사 URL 정규화 (추적용 쿼리 파라미터, fragment 제거)
+def canonicalize_article_url(url):
+    parts = urlsplit(url.strip())
+    query = [(key, value) for key, value in parse_qsl(parts.query)
+             if key.lower() not in NEWS_URL_TRACKING_PARAMS and not key.lower().startswith('utm_')]
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(sorted(query)), ''))
+
+# 기사 요약 캐시 키 (정규화한 URL 해시, URL이 없으면 설명 해시)
+def article_summary_key(article):
+    url = article.get('url')
+    if url:
+        return 'url:' + hashlib.sha1(canonicalize_article_url(url).encode('utf-8')).hexdigest()
+    return 'desc:' + hashlib.sha1(clean_news_description(article['description']).encode('utf-8')).hexdigest()
+
+# Gemini로 생성한 요약만 캐시에 저장 (설명으로 대체한 경우는 저장하지 않음)
+def store_article_summary(article):
+    summary_cache.set(article_summary_key(article), article['korean_summary'])
+
+# 제한 시간이 지난 뒤 끝난 요약 저장 (실패한 경우는 무시)
+def store_late_summary(article, future):
+    if future.cancelled() or future.exception() is not None:
+        return
+    article['korean_summary'] = future.result()
+    store_article_summary(article)
+    print(f"Stored late summary: {article['title']}")
+
+# 캐시에 있는 기사는 저장된 요약을 사용하고 나머지만 요약 생성
+def summarize_articles(articles, summary_mode):
+    missing_articles = []
+    for article in articles:
+        cached = summary_cache.get(article_summary_key(article))
+        if cached is None:
+            missing_articles.append(article)
+        else:
+            article['korean_summary'] = cached
+
+    if not missing_articles:
+        return articles
+    if summary_mode == 'batch':
+        summarize_articles_batched(missing_articles)
+    else:
+        summarize_articles_concurrently(missing_articles)
+    return articles
+
+# RSS 기사 설명의 HTML 제거 (출처 표시 <font>, 링크 태그, HTML 엔티티)
+def clean_news_description(description):
+    text = NEWS_SOURCE_PATTERN.sub(' ', description)
+    text = HTML_TAG_PATTERN.sub(' ', text)
+    return ' '.join(html.unescape(text).split())
+
+# 여러 기사 한글 요약 일괄 생성 함수 (기사 순서대로 요약 배열 반환, 응답에 없는 기사는 None)
+# 빠진 기사는 호출한 쪽에서 기사별 요약으로 처리하므로 다시 요청하지 않음
+@retry_on_error(max_retries=3, delay=1, gemini=True)
+def summarize_news_batch_in_korean(texts, deadline=None):
+    try:
+        def build_prompt(ids):
+            return f"""
+        Summarize each of the following news articles in Korean in 4-5 sentences:
+
+        {json.dumps([{'id': index, 'text': texts[index]} for index in ids], ensure_ascii=False)}
+
+        Rules:
+        1. Keep it concise and clear
+        2. Use natural Korean language
+        3. Focus on the main points
+        4. Return one item per article with its id and summary
+        """
+
+        found = generate_records(model, build_prompt, list(range(len(texts))), 'id', NEWS_SUMMARY_ITEM_SCHEMA,
+                                 request_options=gemini_request_options(deadline), repair_rounds=0)
+        return [found[str(index)]['summary'] if str(index) in found else None for index in range(len(texts))]
+    except Exception as e:
+        print(f"Error in summarize_news_batch: {str(e)}")
+        raise
+
+# 기사 요약을 동시에 생성 (기사별 제한 시간 안에 끝나지 않거나 실패하면 기사 설명으로 대체)
+def summarize_articles_concurrently(articles):
+    futures = []
+    for article in articles:
+        deadline = Deadline(NEWS_SUMMARY_TIMEOUT_SECONDS, NEWS_SUMMARY_RETRY_BUDGET)
+        futures.append(summary_executor.submit(
+            llm_flight.do, f"summary:{article_summary_key(article)}",
+            summarize_news_in_korean, clean_news_description(article['description']), deadline=deadline
+        ))
+    wait(futures, timeout=NEWS_SUMMARY_TIMEOUT_SECONDS)
+
+    for article, future in zip(articles, futures):
+        if not future.done():
+            print(f"Summary timed out, using description: {article['title']}")
+            # 이미 시작된 요약은 취소되지 않으므로, 늦게라도 끝나면 다음 요청을 위해 캐시에 저장
+            if not future.cancel():
+                future.add_done_callback(lambda late, article=dict(article): store_late_summary(article, late))
+            article['korean_summary'] = clean_news_description(article['description'])
+            continue
+        try:
+            article['korean_summary'] = future.result()
+            store_article_summary(article)
+        except Exception as e:
+            print(f"Summary failed, using description: {str(e)}")
+            article['korean_summary'] = clean_news_description(article['description'])
+    return articles
+
+# 모든 기사를 한 번의 프롬프트로 요약
+# 응답에서 빠졌거나 잘못된 기사만 기사별 동시 요약으로 다시 처리
+def summarize_articles_batched(articles):
+    texts = [clean_news_description(article['description']) for article in articles]
+    deadline = Deadline(NEWS_SUMMARY_TIMEOUT_SECONDS, NEWS_SUMMARY_RETRY_BUDGET)
+    # 같은 기사 목록의 일괄 요약은 1번만 요청
+    batch_key = hashlib.sha1('|'.join(article_summary_key(article) for article in articles).encode('utf-8')).hexdigest()
+    future = summary_executor.submit(llm_flight.do, f"summary_batch:{batch_key}", summarize_news_batch_in_korean, texts, deadline=deadline)
     try:
-        response = model.generate_content(prompt)
-        answers = [ans.strip() for ans in response.text.split(',')]
-        return answers[:3]
+        summaries = future.result(timeout=NEWS_SUMMARY_TIMEOUT_SECONDS)
+    except FutureTimeoutError:
+        print(f"Batch summary timed out ({len(articles)} articles)")
+        summaries = []
+    except Exception as e:
+        print(f"Batch summary failed: {str(e)}")
+        summaries = []
+
+    missing_articles = []
+    for index, article in enumerate(articles):
+        summary = summaries[index] if index < len(summaries) else None
+        if isinstance(summary, str) and summary.strip():
+            article['korean_summary'] = summary.strip()
+            store_article_summary(article)
+        else:
+            missing_articles.append(article)
+
+    if missing_articles:
+        summarize_articles_concurrently(missing_articles)
+    return articles
+
+# 오답 후보 생성 함수 (검증은 호출한 쪽에서 clean_wrong_answers로 처리)
+@retry_on_error(max_retries=3, delay=1, gemini=True)
+def generate_wrong_answers(prompt, deadline=None):
+    try:
+        record = generate_record(model, prompt, WRONG_ANSWERS_SCHEMA, request_options=gemini_request_options(deadline))
+        return record['wrong_answers']
     except Exception as e:
         print(f"Error in generate_wrong_answers: {str(e)}")
         raise
 
+# 여러 단어 오답 일괄 생성 함수 (단어 -> 오답 배열 반환, 형식이 맞지 않는 항목은 제외)
+# 빠진 단어는 호출한 쪽에서 더 작은 배치로 다시 요청
+@retry_on_error(max_retries=3, delay=1, gemini=True)
+def generate_wrong_answers_batch(prompt, deadline=None):
+    try:
+        items = generate_json(model, prompt, WRONG_ANSWERS_BATCH_SCHEMA, request_options=gemini_request_options(deadline))
+        if not isinstance(items, list):
+            raise ValueError("AI response is not a JSON array")
+        return {item['answer']: item['wrong_answers'] for item in items if matches(item, WRONG_ANSWERS_BATCH_SCHEMA['items'])}
+    except Exception as e:
+        print(f"Error in generate_wrong_answers_batch: {str(e)}")
+        raise
+
+# 요청된 단어 집계 (뉴스/테스트/소설 엔드포인트)
+def record_hot_words(words):
+    with hot_words_lock:
+        for word in words:
+            keyword = normalize_news_keyword(word).lower()
+            if keyword:
+                hot_words[keyword] += 1
+        if len(hot_words) > MAX_HOT_WORDS:
+            kept = hot_words.most_common(MAX_HOT_WORDS // 2)
+            hot_words.clear()
+            hot_words.update(dict(kept))
+
+# 처리 중인 사용자 요청 수 집계 (미리 받기가 사용자 요청과 Gemini 할당량을 다투지 않도록)
+# 스트리밍 응답은 뷰 함수가 Response를 반환한 뒤에 생성되므로 제너레이터에 붙여서 전송이 끝날 때까지 집계
+def track_live_request(func):
+    if inspect.isgeneratorfunction(func):
+        @wraps(func)
+        def generator_wrapper(*args, **kwargs):
+            global live_requests
+            with hot_words_lock:
+                live_requests += 1
+            try:
+                yield from func(*args, **kwargs)
+            finally:
+                with hot_words_lock:
+                    live_requests -= 1
+        return generator_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        global live_requests
+        with hot_words_lock:
+            live_requests += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with hot_words_lock:
+                live_requests -= 1
+    return wrapper
+
+# 상위 N개 단어를 꺼내고 전체 집계를 감쇠
+def take_hot_words(limit):
+    with hot_words_lock:
+        top_words = [word for word, _ in hot_words.most_common(limit)]
+        for word in list(hot_words):
+            hot_words[word] *= HOT_WORD_DECAY
+            if hot_words[word] < 0.1:
+                del hot_words[word]
+    return top_words
+
+# 미리 받기용 Gemini 호출 예산 (최근 1시간 호출 수가 예산 미만이면 1회 사용)
+def acquire_prefetch_budget():
+    now = time.time()
+    with hot_words_lock:
+        while prefetch_gemini_calls and now - prefetch_gemini_calls[0] > 3600:
+            prefetch_gemini_calls.popleft()
+        if len(prefetch_gemini_calls) >= NEWS_PREFETCH_GEMINI_BUDGET_PER_HOUR:
+            return False
+        prefetch_gemini_calls.append(now)
+        return True
+
+def prefetch_idle():
+    with hot_words_lock:
+        return live_requests < NEWS_PREFETCH_MAX_LIVE_REQUESTS
+
+# 단어 1개의 피드와 요약을 캐시에 채움 (피드가 곧 만료되면 새로 받고, 요약은 없는 기사만 한 번의 프롬프트로 생성)
+def prefetch_news(word):
+    keyword = ' '.join(build_news_query(word).split())
+    cache_key = keyword.lower()
+    with news_feed_lock:
+        entry = news_feed_cache.get(cache_key)
+    if entry is None or time.time() - entry['fetched_at'] > NEWS_FEED_TTL_SECONDS / 2:
+        articles = refresh_news_feed(cache_key, keyword)
+        prefetch_stats['feeds_refreshed'] += 1
+    else:
+        articles = entry['articles']
+
+    missing_articles = [article for article in articles if summary_cache.get(article_summary_key(article)) is None]
+    if not missing_articles or not gemini_available():
+        return
+    if not acquire_prefetch_budget():
+        prefetch_stats['skipped_budget'] += 1
+        return
+
+    # 재시도 없이 1회만 호출 (실패한 기사는 사용자 요청 때 다시 요약)
+    texts = [clean_news_description(article['description']) for article in missing_articles]
+    summaries = summarize_news_batch_in_korean(texts, deadline=Deadline(NEWS_SUMMARY_TIMEOUT_SECONDS, 0))
+    for article, summary in zip(missing_articles, summaries):
+        if isinstance(summary, str) and summary.strip():
+            summary_cache.set(article_summary_key(article), summary.strip())
+            prefetch_stats['summaries'] += 1
+
+# 주기마다 상위 단어 미리 받기 (사용자 요청이 몰리면 남은 단어는 다음 주기로)
+def run_news_prefetcher():
+    while True:
+        time.sleep(NEWS_PREFETCH_INTERVAL_SECONDS)
+        prefetch_stats['runs'] += 1
+        for word in take_hot_words(NEWS_PREFETCH_TOP_N):
+            if not prefetch_idle():
+                prefetch_stats['skipped_busy'] += 1
+                break
+            try:
+                prefetch_news(word)
+                prefetch_stats['words'] += 1
+            except Exception as e:
+                print(f"Error prefetching news for {word}: {str(e)}")
+
+def news_prefetch_stats():
+    with hot_words_lock:
+        stats = dict(prefetch_stats)
+        stats['hot_words'] = [[word, round(count, 2)] for word, count in hot_words.most_common(NEWS_PREFETCH_TOP_N)]
+        stats['gemini_calls_last_hour'] = len([t for t in prefetch_gemini_calls if time.time() - t <= 3600])
+        stats['live_requests'] = live_requests
+    return stats
+
+if NEWS_PREFETCH_ENABLED:
+    threading.Thread(target=run_news_prefetcher, daemon=True).start()
+
 # 뉴스 추천 API 엔드포인트
 @app.route('/Python/generate-news', methods=['POST'])
 @limiter.limit("10 per minute")
+@track_live_request
 def news_recommend():
     try:
         data = request.get_json()
@@ -142,7 +819,19 @@ def news_recommend():
             return jsonify({'error': 'No word provided'}), 400
             
         word = data['word']
-        search_context = generate_news_context(word)
+        if not normalize_news_keyword(word):
+            return jsonify({'error': 'No word provided'}), 400
+        record_hot_words([word])
+
+        summary_mode = data.get('summary_mode', 'batch')
+        if summary_mode not in ['batch', 'per_article']:
+            return jsonify({'error': 'summary_mode must be batch or per_article'}), 400
+
+        query_expansion = data.get('query_expansion', 'none')
+        if query_expansion not in NEWS_QUERY_EXPANSIONS:
+            return jsonify({'error': f'query_expansion must be one of {NEWS_QUERY_EXPANSIONS}'}), 400
+
+        search_context = build_news_query(word, query_expansion)
         news_articles = search_news(search_context)
         
         if not news_articles:
@@ -152,9 +841,8 @@ def news_recommend():
                 'search_context': search_context
             }), 404
             
-        # 각 기사에 대한 한글 요약 추가
-        for article in news_articles:
-            article['korean_summary'] = summarize_news_in_korean(article['description'])
+        # 각 기사에 대한 한글 요약 추가 (캐시 우선, batch: 한 번의 프롬프트, per_article: 기사별 동시 실행)
+        summarize_articles(news_articles, summary_mode)
         
         return jsonify({
             'word': word,
@@ -166,234 +854,1078 @@ def news_recommend():
         print(f"Error in news_recommend: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-# 테스트 생성 API 엔드포인트
-@app.route('/Python/generate-test', methods=['POST'])
+# 단어 데이터에서 (영단어, 뜻) 추출
+def extract_word_pair(word_data):
+    if 'english' in word_data and 'korean' in word_data:
+        return word_data['english'], word_data['korean']
+    if 'word' in word_data and 'meaning' in word_data:
+        return word_data['word'], word_data['meaning']
+    return None
+
+# 오답 생성 프롬프트
+def build_wrong_answer_prompt(word, meaning, test_type):
+    if test_type == 'meaning':
+        return f"'{meaning}'와 완전히 다른 의미를 가진 한국어 단어를 품사 상관없이 3개만 wrong_answers 배열에 담아주세요."
+    return f"'{word}'와 완전히 다른 의미를 가진 영단어를 품사 상관없이 3개만 wrong_answers 배열에 담아주세요."
+
+# 여러 단어의 오답을 한 번에 요청하는 프롬프트
+def build_batch_wrong_answer_prompt(answers, test_type):
+    kind = "한국어 단어" if test_type == 'meaning' else "영단어"
+    return f"""
+    다음 목록의 각 항목마다 그 항목과 완전히 다른 의미를 가진 {kind}를 품사 상관없이 3개씩 만들어주세요.
+    {json.dumps(answers, ensure_ascii=False)}
+
+    규칙:
+    1. 목록의 항목마다 객체 1개씩 배열로 반환할 것
+    2. answer에는 목록의 항목을 그대로 쓰고, wrong_answers에는 오답 3개를 담을 것
+    """
+
+# 문제의 정답 (뜻 문제면 뜻, 단어 문제면 영단어)
+def correct_answer_of(word, meaning, test_type):
+    return meaning if test_type == 'meaning' else word
+
+# 배치 응답의 오답 목록 검증 (정답과 같거나 빈 값은 제외, 3개 미만이면 None)
+def clean_wrong_answers(candidates, answer):
+    if not isinstance(candidates, list):
+        return None
+
+    wrong_answers = []
+    seen = {answer.strip().lower()}
+    for candidate in candidates:
+        if not isinstance(candidate, str):
+            continue
+        candidate = candidate.strip()
+        if not candidate or candidate.lower() in seen:
+            continue
+        seen.add(candidate.lower())
+        wrong_answers.append(candidate)
+
+    return wrong_answers[:3] if len(wrong_answers) >= 3 else None
+
+# 오답 캐시 키 (공백/대소문자 정규화한 정답 + test_type)
+def distractor_cache_key(word, meaning, test_type):
+    answer = ' '.join(correct_answer_of(word, meaning, test_type).lower().split())
+    return f"{test_type}:{answer}"
+
+# 단어별 오답 생성의 llm_flight 키 (같은 정답의 동시 요청 합치기, 최근 실패 확인)
+def distractor_flight_key(word, meaning, test_type):
+    return f"distractors:{distractor_cache_key(word, meaning, test_type)}"
+
+# 정답과 오답으로 문제 구성 (보기 순서 섞기)
+def build_question(word, meaning, test_type, wrong_answers):
+    if test_type == 'meaning':
+        question = {'word': word, 'choices': [meaning] + wrong_answers[:3]}
+    else:
+        question = {'word': meaning, 'choices': [word] + wrong_answers[:3]}
+
+    choices = question['choices']
+    correct_choice = choices[0]
+    random.shuffle(choices)
+    question['correct_answer'] = choices.index(correct_choice)
+    return question
+
+# 단어 1개에 대한 문제 생성 (오답이 3개 미만이면 None)
+def generate_question(word, meaning, test_type, deadline=None):
+    cache_key = distractor_cache_key(word, meaning, test_type)
+    wrong_answers = distractor_cache.get(cache_key)
+    if wrong_answers is None:
+        if deadline is not None and deadline.expired():
+            return None
+        wrong_answers = llm_flight.do(distractor_flight_key(word, meaning, test_type), generate_and_cache_wrong_answers,
+                                      word, meaning, test_type, deadline)
+        if wrong_answers is None:
+            return None
+    return build_question(word, meaning, test_type, wrong_answers)
+
+# 단어 1개의 오답을 생성해 캐시에 저장 (같은 정답의 동시 요청은 llm_flight로 1번만 실행)
+# 배치 응답과 같이 정답과 같거나 중복/빈 값을 제외하고, 유효한 오답이 3개 미만이면 저장하지 않고 None
+def generate_and_cache_wrong_answers(word, meaning, test_type, deadline=None):
+    candidates = generate_wrong_answers(build_wrong_answer_prompt(word, meaning, test_type), deadline=deadline)
+    wrong_answers = clean_wrong_answers(candidates, correct_answer_of(word, meaning, test_type))
+    if wrong_answers is None:
+        return None
+    distractor_cache.set(distractor_cache_key(word, meaning, test_type), wrong_answers)
+    return wrong_answers
+
+# 여러 단어의 문제를 워커 풀에서 동시에 생성
+# 결과는 입력 순서대로 조립하고, 실패한 단어는 다른 단어에 영향 없이 따로 모아서 반환
+# timeout(초) 또는 마감 시간 안에 끝나지 않은 단어도 실패로 처리
+def generate_questions_concurrently(pairs, test_type, max_workers, timeout=None, deadline=None):
+    if not pairs:
+        return [], []
+
+    questions = []
+    failed_pairs = []
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(pairs)))
+    futures = [executor.submit(generate_question, word, meaning, test_type, deadline) for word, meaning in pairs]
+    wait(futures, timeout=wait_timeout(timeout, deadline))
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    for (word, meaning), future in zip(pairs, futures):
+        if not future.done():
+            print(f"Timed out processing word {word}")
+            failed_pairs.append((word, meaning))
+            continue
+
+        try:
+            question = future.result()
+        except Exception as e:
+            print(f"Error processing word {word}: {str(e)}")
+            question = None
+
+        if question is None:
+            failed_pairs.append((word, meaning))
+        else:
+            questions.append(question)
+
+    return questions, failed_pairs
+
+# generate_questions_concurrently와 같지만 문제가 완성되는 순서대로 하나씩 반환 (스트리밍용)
+# 실패하거나 시간 안에 끝나지 않은 단어는 failed_pairs 목록에 추가
+def iter_questions_concurrently(pairs, test_type, max_workers, failed_pairs, timeout=None, deadline=None):
+    if not pairs:
+        return
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(pairs)))
+    pending = {executor.submit(generate_question, word, meaning, test_type, deadline): (word, meaning) for word, meaning in pairs}
+    try:
+        for future in as_completed(list(pending), timeout=wait_timeout(timeout, deadline)):
+            word, meaning = pending.pop(future)
+            try:
+                question = future.result()
+            except Exception as e:
+                print(f"Error processing word {word}: {str(e)}")
+                question = None
+
+            if question is None:
+                failed_pairs.append((word, meaning))
+            else:
+                yield question
+    except FutureTimeoutError:
+        print(f"Timed out processing {len(pending)} words")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        failed_pairs.extend(pending.values())
+
+# 대기 시간 (timeout과 마감까지 남은 시간 중 짧은 쪽)
+def wait_timeout(timeout, deadline):
+    if deadline is None:
+        return timeout
+    if timeout is None:
+        return deadline.remaining()
+    return min(timeout, deadline.remaining())
+
+# 배치 생성을 timeout(초) 또는 마감 시간까지만 기다리고, 넘기면 전체를 실패로 처리
+def generate_questions_batched_with_timeout(pairs, test_type, timeout=None, deadline=None):
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(generate_questions_batched, pairs, test_type, deadline)
+    executor.shutdown(wait=False)
+    try:
+        return future.result(timeout=wait_timeout(timeout, deadline))
+    except FutureTimeoutError:
+        print(f"Timed out waiting for batch distractors ({len(pairs)} words)")
+        return [], list(pairs)
+
+# 로컬 어휘 풀에서 오답을 골라 문제 생성 (LLM 호출 없음)
+def generate_questions_locally(pairs, test_type):
+    questions = []
+    failed_pairs = []
+    for word, meaning in pairs:
+        # 캐시에 Gemini 오답이 있으면 우선 사용
+        wrong_answers = distractor_cache.get(distractor_cache_key(word, meaning, test_type))
+        if wrong_answers is None:
+            others = [pair for pair in pairs if pair[0] != word]
+            wrong_answers = distractor_pool.pick(word, meaning, test_type, extra_pairs=others)
+        if len(wrong_answers) < 3:
+            failed_pairs.append((word, meaning))
+        else:
+            questions.append(build_question(word, meaning, test_type, wrong_answers))
+    return questions, failed_pairs
+
+# 단어 목록 전체의 문제를 한 번의 프롬프트로 생성
+# 응답에서 빠졌거나 형식이 잘못된 단어만 모아 더 작은 배치로 다시 요청
+def generate_questions_batched(pairs, test_type, deadline=None):
+    wrong_answers_by_pair = {}
+    pending_pairs = []
+    for word, meaning in pairs:
+        cached = distractor_cache.get(distractor_cache_key(word, meaning, test_type))
+        if cached is None:
+            pending_pairs.append((word, meaning))
+        else:
+            wrong_answers_by_pair[(word, meaning)] = cached
+
+    for attempt in range(1 + BATCH_FOLLOWUP_ROUNDS):
+        if not pending_pairs:
+            break
+        if attempt > 0:
+            if deadline is not None and not deadline.allow_retry():
+                break
+            print(f"Batch follow-up {attempt} for {len(pending_pairs)} words")
+
+        answers = list(dict.fromkeys(correct_answer_of(word, meaning, test_type) for word, meaning in pending_pairs))
+        # 같은 단어 목록의 일괄 요청은 1번만 실행
+        batch_key = hashlib.sha1(json.dumps([test_type] + [normalize_key(answer) for answer in answers], ensure_ascii=False).encode('utf-8')).hexdigest()
+        try:
+            reply = llm_flight.do(f"distractors_batch:{batch_key}", generate_wrong_answers_batch,
+                                  build_batch_wrong_answer_prompt(answers, test_type), deadline=deadline)
+        except Exception as e:
+            print(f"Error in batch distractor request: {str(e)}")
+            break
+
+        reply = {str(key).strip().lower(): value for key, value in reply.items()}
+        missing_pairs = []
+        for word, meaning in pending_pairs:
+            answer = correct_answer_of(word, meaning, test_type)
+            wrong_answers = clean_wrong_answers(reply.get(answer.strip().lower()), answer)
+            if wrong_answers is None:
+                missing_pairs.append((word, meaning))
+            else:
+                wrong_answers_by_pair[(word, meaning)] = wrong_answers
+                distractor_cache.set(distractor_cache_key(word, meaning, test_type), wrong_answers)
+        pending_pairs = missing_pairs
+
+    questions = []
+    failed_pairs = []
+    for word, meaning in pairs:
+        wrong_answers = wrong_answers_by_pair.get((word, meaning))
+        if wrong_answers is None:
+            failed_pairs.append((word, meaning))
+        else:
+            questions.append(build_question(word, meaning, test_type, wrong_answers))
+
+    return questions, failed_pairs
+
+# 문제 은행 키 (단어 + test_type)
+def question_bank_key(word, test_type):
+    return f"{test_type}:{' '.join(word.lower().split())}"
+
+# 문제 은행에서 문제 조회 (뜻이 바뀐 항목은 무효화하고 새로 생성하도록 반환)
+def lookup_question_bank(pairs, test_type):
+    questions = []
+    missing_pairs = []
+    for word, meaning in pairs:
+        key = question_bank_key(word, test_type)
+        entry = question_bank.get(key)
+        if entry is not None and entry['meaning'] != meaning:
+            print(f"Meaning changed for {word}, invalidating question bank entry")
+            question_bank.delete(key)
+            entry = None
+
+        if entry is None:
+            missing_pairs.append((word, meaning))
+        else:
+            questions.append(build_question(word, meaning, test_type, list(entry['wrong_answers'])))
+    return questions, missing_pairs
+
+# 끝난 작업만 오래된 순서로 삭제 (대기/실행 중인 작업은 유지)
+def prune_bank_jobs():
+    finished = [job_id for job_id, job in bank_jobs.items() if job.get('finished_at')]
+    for job_id in finished[:max(0, len(finished) - MAX_BANK_JOBS)]:
+        del bank_jobs[job_id]
+
+def update_bank_job(job_id, **fields):
+    with bank_jobs_lock:
+        if job_id in bank_jobs:
+            bank_jobs[job_id].update(fields)
+
+# 단어 목록 전체의 문제를 미리 생성해서 문제 은행에 저장 (백그라운드 작업)
+def warm_question_bank(job_id, pairs, test_types):
+    update_bank_job(job_id, status='running', started_at=time.time())
+    stored = 0
+    failed = 0
+    try:
+        for test_type in test_types:
+            _, missing_pairs = lookup_question_bank(pairs, test_type)
+            for start in range(0, len(missing_pairs), 20):
+                chunk = missing_pairs[start:start + 20]
+                _, failed_pairs = generate_questions_batched(chunk, test_type)
+                if failed_pairs:
+                    generate_questions_concurrently(failed_pairs, test_type, TEST_MAX_WORKERS)
+
+                # 생성된 오답은 오답 캐시에 저장되어 있으므로 그대로 문제 은행에 기록
+                for word, meaning in chunk:
+                    wrong_answers = distractor_cache.get(distractor_cache_key(word, meaning, test_type))
+                    if wrong_answers is None:
+                        failed += 1
+                        continue
+                    question_bank.set(question_bank_key(word, test_type), {
+                        'word': word,
+                        'meaning': meaning,
+                        'wrong_answers': wrong_answers
+                    })
+                    stored += 1
+                update_bank_job(job_id, stored=stored, failed=failed)
+
+            stored += len(pairs) - len(missing_pairs)
+        update_bank_job(job_id, status='done', stored=stored, failed=failed, finished_at=time.time())
+    except Exception as e:
+        print(f"Error in warm_question_bank: {str(e)}")
+        update_bank_job(job_id, status='error', error=str(e), stored=stored, failed=failed, finished_at=time.time())
+
+# 문제 은행 미리 생성 API 엔드포인트 (단어장 전체를 받아 백그라운드에서 생성)
+@app.route('/Python/precompute-test', methods=['POST'])
 @limiter.limit("10 per minute")
-def generate_test():
+def precompute_test():
     try:
         data = request.get_json()
         if not data:
             return jsonify({'error': 'No data provided'}), 400
-            
+
         words = data.get('words', [])
-        test_type = data.get('test_type')
-        
         if not words or not isinstance(words, list):
             return jsonify({'error': 'Valid words list is required'}), 400
-            
-        if not test_type or test_type not in ['meaning', 'word']:
-            return jsonify({'error': 'Valid test_type is required'}), 400
 
-        target_count = min(len(words), 20)
-        random.shuffle(words)
-        
-        questions = []
-        failed_words = []
-        processed_words = set()
-        
-        if len(words) > 20:
-            words = random.sample(words, 20)
+        test_types = data.get('test_types')
+        if not test_types:
+            test_types = [data['test_type']] if data.get('test_type') else ['meaning', 'word']
+        if not isinstance(test_types, list) or any(test_type not in ['meaning', 'word'] for test_type in test_types):
+            return jsonify({'error': 'Valid test_types are required'}), 400
 
-        # 첫 번째 시도
+        pairs = []
+        processed_words = set()
         for word_data in words:
-            if len(questions) >= target_count:
-                break
-                
-            try:
-                if 'english' in word_data and 'korean' in word_data:
-                    word = word_data['english']
-                    meaning = word_data['korean']
-                elif 'word' in word_data and 'meaning' in word_data:
-                    word = word_data['word']
-                    meaning = word_data['meaning']
-                else:
-                    continue
+            pair = extract_word_pair(word_data)
+            if pair is None or pair[0] in processed_words:
+                continue
+            processed_words.add(pair[0])
+            pairs.append(pair)
+        distractor_pool.add_words(pairs)
 
-                if word in processed_words:
-                    continue
-                    
-                if test_type == 'meaning':
-                    prompt = f"'{meaning}'와 완전히 다른 의미를 가진 한국어 단어를 품사 상관없이 3개만 나열해주세요. 쉼표로 구분하고 다른 설명은 하지 마세요."
-                    wrong_answers = generate_wrong_answers(prompt)
-                    
-                    if len(wrong_answers) < 3:
-                        failed_words.append(word_data)
-                        continue
-                    
-                    question = {
-                        'word': word,
-                        'choices': [meaning] + wrong_answers,
-                        'correct_answer': 0
-                    }
-                    
-                else:
-                    prompt = f"'{word}'와 완전히 다른 의미를 가진 영단어를 품사 상관없이 3개만 나열해주세요. 쉼표로 구분하고 다른 설명은 하지 마세요."
-                    wrong_answers = generate_wrong_answers(prompt)
-                    
-                    if len(wrong_answers) < 3:
-                        failed_words.append(word_data)
-                        continue
-                    
-                    question = {
-                        'word': meaning,
-                        'choices': [word] + wrong_answers,
-                        'correct_answer': 0
-                    }
-
-                choices = question['choices']
-                correct_choice = choices[0]
-                random.shuffle(choices)
-                question['correct_answer'] = choices.index(correct_choice)
-                
-                questions.append(question)
-                processed_words.add(word)
+        job_id = str(uuid.uuid4())
+        with bank_jobs_lock:
+            prune_bank_jobs()
+            pending = sum(1 for job in bank_jobs.values() if job['status'] in ['queued', 'running'])
+            if pending >= QUESTION_BANK_WORKERS + QUESTION_BANK_QUEUE_SIZE:
+                return jsonify({'error': 'Job queue is full, try again later'}), 503
+            bank_jobs[job_id] = {
+                'job_id': job_id,
+                'status': 'queued',
+                'total': len(pairs) * len(test_types),
+                'stored': 0,
+                'failed': 0
+            }
+            job = dict(bank_jobs[job_id])
+        bank_executor.submit(warm_question_bank, job_id, pairs, test_types)
 
-            except Exception as e:
-                print(f"Error processing word {word if 'word' in locals() else 'unknown'}: {str(e)}")
-                failed_words.append(word_data)
-                continue
+        return jsonify(job), 202
 
-        # 재시도 로직
-        retry_count = 0
-        while len(questions) < target_count and failed_words:
-            retry_count += 1
-            print(f"Retry attempt {retry_count} for failed words")
-            
-            retry_words = failed_words.copy()
-            failed_words = []
-            
-            for word_data in retry_words:
-                if len(questions) >= target_count:
-                    break
-                    
-                try:
-                    if 'english' in word_data and 'korean' in word_data:
-                        word = word_data['english']
-                        meaning = word_data['korean']
-                    elif 'word' in word_data and 'meaning' in word_data:
-                        word = word_data['word']
-                        meaning = word_data['meaning']
-                    else:
-                        continue
+    except Exception as e:
+        print(f"Error in precompute_test: {str(e)}")
+        return jsonify({'error': str(e)}), 400
 
-                    if word in processed_words:
-                        continue
+# 문제 은행 생성 작업 상태 조회
+@app.route('/Python/precompute-test/<job_id>', methods=['GET'])
+@limiter.limit(STATUS_POLL_LIMIT)
+def precompute_test_status(job_id):
+    with bank_jobs_lock:
+        job = bank_jobs.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(dict(job))
 
-                    if test_type == 'meaning':
-                        prompt = f"'{meaning}'와 완전히 다른 의미를 가진 한국어 단어를 품사 상관없이 3개만 나열해주세요. 쉼표로 구분하고 다른 설명은 하지 마세요."
-                    else:
-                        prompt = f"'{word}'와 완전히 다른 의미를 가진 영단어를 품사 상관없이 3개만 나열해주세요. 쉼표로 구분하고 다른 설명은 하지 마세요."
+# 테스트 생성 요청 검증 및 공통 값 정리 (잘못된 요청이면 ValueError)
+def parse_test_request(data, default_mode='batch'):
+    if not data:
+        raise ValueError('No data provided')
 
-                    wrong_answers = generate_wrong_answers(prompt)
+    words = data.get('words', [])
+    test_type = data.get('test_type')
 
-                    if len(wrong_answers) < 3:
-                        failed_words.append(word_data)
-                        continue
+    if not words or not isinstance(words, list):
+        raise ValueError('Valid words list is required')
 
-                    question = {
-                        'word': word if test_type == 'meaning' else meaning,
-                        'choices': [meaning if test_type == 'meaning' else word] + wrong_answers,
-                        'correct_answer': 0
-                    }
+    if not test_type or test_type not in ['meaning', 'word']:
+        raise ValueError('Valid test_type is required')
 
-                    choices = question['choices']
-                    correct_choice = choices[0]
-                    random.shuffle(choices)
-                    question['correct_answer'] = choices.index(correct_choice)
+    distractor_mode = data.get('distractor_mode', default_mode)
+    if distractor_mode not in DISTRACTOR_MODES:
+        raise ValueError(f'distractor_mode must be one of {DISTRACTOR_MODES}')
 
-                    questions.append(question)
-                    processed_words.add(word)
+    try:
+        max_workers = max(1, min(int(data.get('max_workers', TEST_MAX_WORKERS)), TEST_MAX_WORKERS))
+        deadline_seconds = min(float(data.get('deadline_seconds', TEST_DEADLINE_SECONDS)), TEST_DEADLINE_SECONDS)
+    except (TypeError, ValueError):
+        raise ValueError('max_workers and deadline_seconds must be numbers')
 
-                except Exception as e:
-                    print(f"Error in retry {retry_count} for word {word if 'word' in locals() else 'unknown'}: {str(e)}")
-                    failed_words.append(word_data)
-                    time.sleep(1)
+    target_count = min(len(words), 20)
+    random.shuffle(words)
 
-        if len(questions) < target_count:
-            print(f"Warning: Could only generate {len(questions)} out of {target_count} questions after {retry_count} retries")
-            return jsonify({
-                'error': f'목표한 {target_count}개의 문제 중 {len(questions)}개만 생성되었습니다.',
-                'questions': questions,
-                'total': len(questions)
-            }), 206
+    if len(words) > 20:
+        words = random.sample(words, 20)
 
-        return jsonify({
+    # 중복 단어와 형식이 맞지 않는 데이터 제외
+    pairs = []
+    processed_words = set()
+    for word_data in words:
+        pair = extract_word_pair(word_data)
+        if pair is None or pair[0] in processed_words:
+            continue
+        processed_words.add(pair[0])
+        pairs.append(pair)
+
+    distractor_pool.add_words(pairs)
+    return {
+        'pairs': pairs,
+        'test_type': test_type,
+        'distractor_mode': distractor_mode,
+        'max_workers': max_workers,
+        # 요청 전체의 마감 시간 (Deadline은 생성을 시작할 때 만들어서 작업 대기 시간은 포함하지 않음)
+        'deadline_seconds': deadline_seconds,
+        'target_count': target_count
+    }
+
+# 테스트 문제를 생성되는 대로 하나씩 반환
+# 문제 은행 -> Gemini(batch/per_word) -> 재시도 -> 로컬 어휘 풀 순서로 처리하고,
+# 끝까지 만들지 못한 단어와 재시도 횟수는 summary에 기록
+# incremental=True면 단어별 생성 결과를 완성되는 즉시 반환 (스트리밍용)
+def iter_test_questions(params, summary, incremental=False):
+    test_type = params['test_type']
+    distractor_mode = params['distractor_mode']
+    max_workers = params['max_workers']
+    deadline = Deadline(params['deadline_seconds'], TEST_RETRY_BUDGET)
+    target_count = params['target_count']
+    summary['retry_count'] = 0
+    count = 0
+
+    # 단어별 동시 생성 (incremental이면 완성 순서, 아니면 입력 순서)
+    def generate_per_word(pairs, failed_pairs):
+        if incremental:
+            return iter_questions_concurrently(pairs, test_type, max_workers, failed_pairs, GEMINI_SLOW_SECONDS, deadline)
+        questions, failed = generate_questions_concurrently(pairs, test_type, max_workers, GEMINI_SLOW_SECONDS, deadline)
+        failed_pairs.extend(failed)
+        return questions
+
+    # 문제 은행에 미리 만들어 둔 문제는 보기 순서만 다시 섞어서 사용
+    bank_questions, failed_pairs = lookup_question_bank(params['pairs'], test_type)
+    for question in bank_questions:
+        count += 1
+        yield question
+
+    if failed_pairs and distractor_mode != 'local' and gemini_available():
+        # 첫 번째 시도 (batch: 한 번의 프롬프트, per_word: 단어별 동시 실행)
+        started = time.time()
+        pending_pairs, failed_pairs = failed_pairs, []
+        if distractor_mode == 'batch':
+            generated_questions, failed_pairs = generate_questions_batched_with_timeout(pending_pairs, test_type, GEMINI_SLOW_SECONDS, deadline)
+        else:
+            generated_questions = generate_per_word(pending_pairs, failed_pairs)
+        for question in generated_questions:
+            count += 1
+            yield question
+        gemini_slow = time.time() - started >= GEMINI_SLOW_SECONDS
+
+        # 재시도 로직 (남은 단어는 단어별 생성으로 처리)
+        # Gemini가 느리거나 할당량 초과, 마감 시간/재시도 예산 소진 시 중단
+        # 최근 Gemini 오류가 기억된 단어는 다시 요청해도 같은 오류이므로 재시도하지 않고 로컬 어휘 풀로 넘김
+        while count < target_count and failed_pairs and not gemini_slow and gemini_available():
+            skipped_pairs = [pair for pair in failed_pairs
+                             if llm_flight.recently_failed(distractor_flight_key(pair[0], pair[1], test_type))]
+            retry_pairs = [pair for pair in failed_pairs if pair not in skipped_pairs]
+            if not retry_pairs:
+                print(f"Skipping retry, {len(skipped_pairs)} words failed recently")
+                break
+            if not deadline.allow_retry(1):
+                break
+            summary['retry_count'] += 1
+            print(f"Retry attempt {summary['retry_count']} for failed words")
+            time.sleep(1)
+
+            started = time.time()
+            pending_pairs, failed_pairs = retry_pairs, skipped_pairs
+            for question in generate_per_word(pending_pairs, failed_pairs):
+                count += 1
+                yield question
+            gemini_slow = time.time() - started >= GEMINI_SLOW_SECONDS
+
+    # local 모드이거나 Gemini로 만들지 못한 단어는 로컬 어휘 풀에서 오답 생성
+    if failed_pairs and count < target_count:
+        if distractor_mode != 'local':
+            print(f"Falling back to local distractors for {len(failed_pairs)} words")
+        local_questions, failed_pairs = generate_questions_locally(failed_pairs, test_type)
+        for question in local_questions:
+            count += 1
+            yield question
+
+    summary['failed_pairs'] = failed_pairs
+
+# 테스트 문제 생성 (결과와 HTTP 상태 코드 반환, 목표 개수를 못 채우면 206)
+def create_test(params):
+    record_hot_words([word for word, _ in params['pairs']])
+
+    target_count = params['target_count']
+    summary = {}
+    questions = list(iter_test_questions(params, summary))
+    retry_count = summary['retry_count']
+
+    if len(questions) < target_count:
+        print(f"Warning: Could only generate {len(questions)} out of {target_count} questions after {retry_count} retries")
+        return {
+            'error': f'목표한 {target_count}개의 문제 중 {len(questions)}개만 생성되었습니다.',
             'questions': questions,
             'total': len(questions)
-        })
+        }, 206
+
+    return {
+        'questions': questions,
+        'total': len(questions)
+    }, 200
+
+# 테스트 생성 API 엔드포인트
+@app.route('/Python/generate-test', methods=['POST'])
+@limiter.limit("10 per minute")
+@track_live_request
+def generate_test():
+    try:
+        try:
+            params = parse_test_request(request.get_json())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        result, status_code = create_test(params)
+        return jsonify(result), status_code
 
     except Exception as e:
         print(f"Error in generate_test: {str(e)}")
         return jsonify({'error': str(e)}), 400
 
-# 소설 생성 API 엔드포인트
-@app.route('/Python/generate-novel', methods=['POST'])
+# 스트리밍 레코드 직렬화 (ndjson: 한 줄에 JSON 1개, sse: Server-Sent Events)
+def format_stream_record(record, stream_format):
+    payload = json.dumps(record, ensure_ascii=False)
+    if stream_format == 'sse':
+        return f"event: {record['type']}\ndata: {payload}\n\n"
+    return payload + "\n"
+
+# 테스트 생성 스트리밍 API 엔드포인트
+# 문제가 완성되는 즉시 1개씩 전송하고, 마지막에 요약(total, failures) 레코드 전송
+@app.route('/Python/generate-test/stream', methods=['POST'])
 @limiter.limit("10 per minute")
-@retry_on_error(max_retries=3, delay=1)
-def generate_novel():
+def generate_test_stream():
+    data = request.get_json()
+    stream_format = (data or {}).get('format', 'ndjson')
+    if stream_format not in ['ndjson', 'sse']:
+        return jsonify({'error': 'format must be ndjson or sse'}), 400
+
     try:
-        data = request.get_json()
-        if not data or 'words' not in data:
-            return jsonify({'error': 'No words provided'}), 400
+        # 스트리밍은 첫 문제를 빨리 보내기 위해 기본적으로 단어별 생성 사용
+        params = parse_test_request(data, default_mode='per_word')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    record_hot_words([word for word, _ in params['pairs']])
 
-        words = data['words']
-        word_list = [f"{word['word']} ({word['meaning']})" for word in words]
+    @track_live_request
+    def generate():
+        summary = {}
+        total = 0
+        try:
+            for question in iter_test_questions(params, summary, incremental=True):
+                yield format_stream_record({'type': 'question', 'index': total, 'question': question}, stream_format)
+                total += 1
+
+            yield format_stream_record({
+                'type': 'summary',
+                'total': total,
+                'target': params['target_count'],
+                'failures': [word for word, _ in summary.get('failed_pairs', [])],
+                'retry_count': summary.get('retry_count', 0)
+            }, stream_format)
+        except Exception as e:
+            print(f"Error in generate_test_stream: {str(e)}")
+            yield format_stream_record({'type': 'error', 'error': str(e), 'total': total}, stream_format)
+
+    mimetype = 'text/event-stream' if stream_format == 'sse' else 'application/x-ndjson'
+    return Response(generate(), mimetype=mimetype, headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# 소설 생성 프롬프트
+def build_novel_prompt(words):
+    word_list = [f"{word['word']} ({word['meaning']})" for word in words]
+
+    return f"""
+    다음 영단어들을 모두 사용하여 흥미로운 짧은 이야기를 만들어주세요:
+    {', '.join(word_list)}
+
+    요구사항:
+    1. 모든 단어를 최소 1번 이상 사용할 것
+    2. 사용된 영단어는 대소문자 구분하지 않을 것
+    3. 이야기는 영어로 작성해주고 작성을 다 작성한 뒤, 한글 해석도 같이 작성해줄 것. 사용된 영단어는 괄호 안에 표시 ex) I like (apple).
+    4. 이야기는 도입-전개-결말 구조를 가질 것
+    5. 전체 길이는 약 800-1200자 정도
+    6. 이야기 제목, 이야기 본문, 이야기 해석은 형식을 따르고 마지막에 사용된 단어 목록은 특히 띄워주는데 예시를 따를 것
+    7. 사용된 단어 목록은 밑의 예시를 따르는데, 사용된 단어를 설명할 단어만 ()표시해줄것.
+    8. 사용된 단어 목록은 밑의 예시를 따르는데, 단어가 여러번 사용되었다면 사용된 모든 문장을 써줄 것
+
+    형식:
+    
+    제목:
+     
+    [이야기 제목]
+
+    [이야기 본문]
+
+    [이야기 제목 해석]
+    
+    [이야기 해석]
+    
+    ---
+    [사용된 단어 목록]
+    ex)
+    ① apple(사과):
+        • I like (apple).
+        - 해석: 나는 사과를 좋아한다.
+        
+        • (Apple) is very delicious.
+        - 해석: 사과는 매우 맛있다.<br>
+      
+    ② go(가다):
+        • I (go) to school.
+        - 해석: 나는 학교에 간다.
         
+        • I want to (go) to that cafe because I want to eat their apple pie.
+        - 해석: 나는 그 곳의 애플파이를 먹고싶기 때문에 그 카페에 가고 싶다.<br>
+    """
+
+# 소설 생성 함수
+@retry_on_error(max_retries=3, delay=1, gemini=True)
+def generate_story(words):
+    try:
+        response = model.generate_content(build_novel_prompt(words), request_options={'timeout': NOVEL_TIMEOUT_SECONDS})
+        return response.text.strip()
+    except Exception as e:
+        print(f"Error in generate_story: {str(e)}")
+        raise
+
+# 단어 목록을 size개 안팎의 고른 묶음으로 나누기 (예: 17개, size 8 -> 6, 6, 5)
+def split_word_groups(words, size):
+    group_count = max(1, -(-len(words) // max(1, size)))
+    base, extra = divmod(len(words), group_count)
+    groups = []
+    start = 0
+    for index in range(group_count):
+        end = start + base + (1 if index < extra else 0)
+        groups.append(words[start:end])
+        start = end
+    return groups
+
+# 모든 장이 공유할 제목/등장인물/줄거리 (짧은 요청 1회, 실패하면 기본값)
+@retry_on_error(max_retries=2, delay=1, gemini=True)
+def generate_story_outline(words, chapter_count):
+    try:
+        prompt = f"""
+        다음 영단어들로 {chapter_count}개의 장으로 된 짧은 영어 이야기를 쓰려고 합니다:
+        {', '.join(str(word['word']) for word in words)}
+
+        이야기 제목(title: 영어, title_ko: 한글), 주인공 소개(characters), 각 장의 한 문장 줄거리(chapters)만 만들어주세요.
+        """
+        return generate_record(model, prompt, STORY_OUTLINE_SCHEMA, request_options={'timeout': NOVEL_TIMEOUT_SECONDS})
+    except Exception as e:
+        print(f"Error in generate_story_outline: {str(e)}")
+        raise
+
+# 이야기의 한 장 생성 (장 본문, 한글 해석, 사용된 단어 목록 JSON 반환)
+@retry_on_error(max_retries=3, delay=1, gemini=True)
+def generate_story_chapter(outline, index, chapter_count, words):
+    try:
+        word_list = [f"{word['word']} ({word['meaning']})" for word in words]
+        plots = outline.get('chapters') or []
         prompt = f"""
-        다음 영단어들을 모두 사용하여 흥미로운 짧은 이야기를 만들어주세요:
-        {', '.join(word_list)}
+        이야기 "{outline.get('title', '')}"의 {chapter_count}개 장 중 {index + 1}장을 영어로 작성해주세요.
+        등장인물: {outline.get('characters', '')}
+        전체 줄거리: {json.dumps(plots, ensure_ascii=False)}
+        이번 장 줄거리: {plots[index] if index < len(plots) else ''}
 
         요구사항:
-        1. 모든 단어를 최소 1번 이상 사용할 것
-        2. 사용된 영단어는 대소문자 구분하지 않을 것
-        3. 이야기는 영어로 작성해주고 작성을 다 작성한 뒤, 한글 해석도 같이 작성해줄 것. 사용된 영단어는 괄호 안에 표시 ex) I like (apple).
-        4. 이야기는 도입-전개-결말 구조를 가질 것
-        5. 전체 길이는 약 800-1200자 정도
-        6. 이야기 제목, 이야기 본문, 이야기 해석은 형식을 따르고 마지막에 사용된 단어 목록은 특히 띄워주는데 예시를 따를 것
-        7. 사용된 단어 목록은 밑의 예시를 따르는데, 사용된 단어를 설명할 단어만 ()표시해줄것.
-        8. 사용된 단어 목록은 밑의 예시를 따르는데, 단어가 여러번 사용되었다면 사용된 모든 문장을 써줄 것
-
-        형식:
-        
-        제목:
-         
-        [이야기 제목]
+        1. 다음 영단어를 모두 최소 1번 이상 사용할 것: {', '.join(word_list)}
+        2. 사용된 영단어는 괄호 안에 표시 ex) I like (apple).
+        3. 앞뒤 장과 자연스럽게 이어지도록 작성하고, 이번 장 길이는 약 {max(300, 1000 // chapter_count)}-{max(500, 1500 // chapter_count)}자
+        4. story에는 영어 본문, translation에는 본문의 한글 해석을 작성할 것
+        5. words에는 사용된 단어마다 그 단어가 쓰인 문장과 해석(sentences)을 모두 적을 것
+        """
+        return generate_record(model, prompt, STORY_CHAPTER_SCHEMA, request_options={'timeout': NOVEL_TIMEOUT_SECONDS})
+    except Exception as e:
+        print(f"Error in generate_story_chapter: {str(e)}")
+        raise
 
-        [이야기 본문]
+# 장들을 기존 소설 형식(제목, 본문, 해석, 사용된 단어 목록)으로 이어 붙이기
+def assemble_chapters(outline, chapters):
+    stories = [chapter['story'].strip() for chapter in chapters]
+    translations = [str(chapter.get('translation', '')).strip() for chapter in chapters]
 
-        [이야기 제목 해석]
-        
-        [이야기 해석]
-        
-        ---
-        [사용된 단어 목록]
-        ex)
-        ① apple(사과):
-            • I like (apple).
-            - 해석: 나는 사과를 좋아한다.
-            
-            • (Apple) is very delicious.
-            - 해석: 사과는 매우 맛있다.<br>
-          
-        ② go(가다):
-            • I (go) to school.
-            - 해석: 나는 학교에 간다.
-            
-            • I want to (go) to that cafe because I want to eat their apple pie.
-            - 해석: 나는 그 곳의 애플파이를 먹고싶기 때문에 그 카페에 가고 싶다.<br>
+    entries = []
+    for chapter in chapters:
+        for used in chapter.get('words') or []:
+            if not isinstance(used, dict) or not used.get('word'):
+                continue
+            number = len(entries)
+            marker = chr(0x2460 + number) if number < 20 else f"{number + 1}."
+            examples = [f"    • {example['sentence']}\n    - 해석: {example.get('translation', '')}"
+                        for example in used.get('sentences') or [] if isinstance(example, dict) and example.get('sentence')]
+            entries.append(f"{marker} {used['word']}({used.get('meaning', '')}):\n" + '\n\n'.join(examples) + "<br>")
+
+    return (
+        f"제목:\n\n{outline.get('title', '')}\n\n" + '\n\n'.join(stories)
+        + f"\n\n{outline.get('title_ko', '')}\n\n" + '\n\n'.join(translation for translation in translations if translation)
+        + "\n\n---\n[사용된 단어 목록]\n" + '\n\n'.join(entries)
+    )
+
+# 단어 묶음마다 이어지는 장을 동시에 생성해서 하나의 이야기로 합침
+# (실패한 장의 단어는 빠진 단어 보완 요청에서 채움)
+# 장이 1개뿐이거나 NOVEL_MAX_CHAPTERS개를 넘으면 Gemini 호출이 늘어나지 않도록 한 번에 생성
+def generate_chaptered_story(words, chapter_size=NOVEL_CHAPTER_SIZE):
+    groups = split_word_groups(words, chapter_size)
+    if len(groups) > NOVEL_MAX_CHAPTERS:
+        print(f"{len(groups)} chapters exceed the limit of {NOVEL_MAX_CHAPTERS}, generating in a single request")
+        return generate_story(words)
+    if len(groups) == 1:
+        return generate_story(words)
+
+    try:
+        outline = generate_story_outline(words, len(groups))
+    except Exception as e:
+        print(f"Outline failed, using a default outline: {str(e)}")
+        outline = {}
+
+    futures = [chapter_executor.submit(generate_story_chapter, outline, index, len(groups), group)
+               for index, group in enumerate(groups)]
+    chapters = []
+    for future in futures:
+        try:
+            chapters.append(future.result())
+        except Exception as e:
+            print(f"Chapter failed: {str(e)}")
+    if not chapters:
+        raise RuntimeError("All chapters failed")
+    return assemble_chapters(outline, chapters)
+
+# 단어 사용 여부를 확인할 영어 본문 (마지막 '사용된 단어 목록' 앞까지, 한글이 있는 줄은 제외)
+# 한글 해석에도 '포기했다(give up)'처럼 괄호 표시가 남아 있어서, 해석을 포함하면 빠진 단어를 사용한 것으로 보게 됨
+def story_body(story):
+    body = story.split('\n---', 1)[0]
+    return '\n'.join(line for line in body.split('\n') if not HANGUL_PATTERN.search(line))
+
+# '사용된 단어 목록' 앞부분을 영어 부분(제목 줄 포함)과 한글 해석 부분으로 나누기
+# (영어 줄이 나온 뒤 처음으로 한글이 있는 줄부터 해석)
+def split_story_sections(body):
+    lines = body.split('\n')
+    seen_english = False
+    for index, line in enumerate(lines):
+        if not line.strip():
+            continue
+        if not HANGUL_PATTERN.search(line):
+            seen_english = True
+        elif seen_english:
+            return '\n'.join(lines[:index]), '\n'.join(lines[index:])
+    return body, ''
+
+# 이야기에서 빠진 단어 목록 (변화형, 괄호 표시 포함해서 확인)
+def find_missing_words(story, words):
+    return WordCoverage([str(word['word']) for word in words]).missing(story_body(story))
+
+# 빠진 단어만 넣는 짧은 보완 요청 (단어별 문장 1개와 해석 반환)
+@retry_on_error(max_retries=2, delay=1, gemini=True)
+def generate_story_repair(story, missing_words):
+    try:
+        meanings = {normalize_key(item['word']): item['meaning'] for item in missing_words}
+
+        def build_prompt(words):
+            return f"""
+        다음 영어 이야기에 아래 단어들이 빠져 있습니다:
+        {json.dumps([{'word': word, 'meaning': meanings[normalize_key(word)]} for word in words], ensure_ascii=False)}
+
+        이야기:
+        {story_body(story)}
+
+        요구사항:
+        1. 이야기 마지막에 자연스럽게 이어지도록 각 단어를 사용한 영어 문장(sentence)을 1개씩 만들 것
+        2. 사용된 영단어는 괄호 안에 표시 ex) I like (apple).
+        3. 각 문장의 한글 해석(translation)을 같이 작성할 것
         """
 
-        response = model.generate_content(prompt)
-        story = response.text.strip()
+        # 응답에 없는 단어만 한 번 더 요청하고, word는 요청한 단어 그대로 반환
+        words = [item['word'] for item in missing_words]
+        found = generate_records(model, build_prompt, words, 'word', STORY_REPAIR_ITEM_SCHEMA,
+                                 request_options={'timeout': NOVEL_TIMEOUT_SECONDS})
+        return [dict(found[normalize_key(word)], word=word) for word in words if normalize_key(word) in found]
+    except Exception as e:
+        print(f"Error in generate_story_repair: {str(e)}")
+        raise
 
-        return jsonify({
-            'story': story,
-            'wordCount': len(words)
-        })
+# 보완 문장은 영어 본문 끝에, 해석은 한글 해석 끝에 추가하고 사용된 단어 목록에도 추가
+def apply_story_repair(story, repairs):
+    body, separator, word_list = story.partition('\n---')
+    english, translation = split_story_sections(body)
+    sentences = ' '.join(repair['sentence'].strip() for repair in repairs)
+    translations = ' '.join(repair['translation'].strip() for repair in repairs)
+    body = f"{english.rstrip()}\n\n{sentences}\n\n"
+    body += f"{translation.strip()}\n\n{translations}" if translation.strip() else translations
+    if not separator:
+        return body
+
+    # 기존 목록 번호(①, ② ...)에 이어서 번호 매기기
+    number = len(re.findall('[\u2460-\u2473]', word_list))
+    entries = []
+    for repair in repairs:
+        marker = chr(0x2460 + number) if number < 20 else f"{number + 1}."
+        number += 1
+        entries.append(f"{marker} {repair['word']}({repair['meaning']}):\n    • {repair['sentence']}\n    - 해석: {repair['translation']}<br>")
+    return f"{body}\n{separator}{word_list.rstrip()}\n\n" + '\n\n'.join(entries)
+
+# 빠진 단어가 있으면 보완 요청 1회 (전체 재생성 없이) 후 남은 빠진 단어와 함께 반환
+def repair_novel(story, words):
+    missing = find_missing_words(story, words)
+    if not missing or not gemini_available():
+        return story, missing
+
+    meanings = {str(word['word']).strip(): word['meaning'] for word in words}
+    try:
+        repairs = generate_story_repair(story, [{'word': word, 'meaning': meanings.get(word, '')} for word in missing])
+    except Exception as e:
+        print(f"Story repair failed: {str(e)}")
+        return story, missing
+
+    # 실제로 빠진 단어를 사용한 문장만 반영
+    valid_repairs = []
+    for repair in repairs:
+        if not isinstance(repair, dict) or repair.get('word') not in missing:
+            continue
+        if not all(isinstance(repair.get(field), str) for field in ['sentence', 'translation']):
+            continue
+        if WordCoverage([repair['word']]).missing(repair['sentence']):
+            continue
+        valid_repairs.append(dict(repair, meaning=meanings.get(repair['word'], '')))
+
+    if valid_repairs:
+        story = apply_story_repair(story, valid_repairs)
+    return story, find_missing_words(story, words)
+
+# 소설 캐시 키 (단어/뜻을 소문자로 정리해서 정렬, 단어 순서와 대소문자는 무시)
+def novel_cache_key(words):
+    word_set = sorted({(str(word['word']).strip().lower(), str(word['meaning']).strip().lower()) for word in words})
+    return hashlib.sha1(json.dumps(word_set, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+# 새 이야기를 캐시에 추가 (최근 NOVEL_CACHE_VARIANTS개만 유지)
+def store_novel(key, story):
+    with novel_cache_lock:
+        variants = novel_cache.get(key) or []
+        variants = (variants + [story])[-NOVEL_CACHE_VARIANTS:]
+        novel_cache.set(key, variants)
+    return len(variants)
+
+# 캐시된 이야기가 NOVEL_CACHE_VARIANTS개보다 적으면 백그라운드에서 1개 더 생성
+def refill_novel_cache(key, words):
+    with novel_cache_lock:
+        if key in novel_refilling:
+            return
+        novel_refilling.add(key)
+
+    def refill():
+        try:
+            if gemini_available() and len(novel_cache.get(key) or []) < NOVEL_CACHE_VARIANTS:
+                story, missing = repair_novel(generate_story(words), words)
+                if not missing:
+                    store_novel(key, story)
+        except Exception as e:
+            print(f"Error refilling novel cache: {str(e)}")
+        finally:
+            with novel_cache_lock:
+                novel_refilling.discard(key)
+
+    novel_executor.submit(refill)
+
+# 소설 생성 (allow_cached가 true면 같은 단어 목록으로 만든 이야기 중 하나를 바로 반환)
+# Gemini 호출 재시도는 generate_story에서 처리
+def create_novel(words, allow_cached=False, mode='single', chapter_size=NOVEL_CHAPTER_SIZE):
+    record_hot_words([word['word'] for word in words if word.get('word')])
+    key = novel_cache_key(words)
+
+    if allow_cached:
+        variants = novel_cache.get(key) or []
+        if variants:
+            if len(variants) < NOVEL_CACHE_VARIANTS:
+                refill_novel_cache(key, words)
+            return {
+                'story': random.choice(variants),
+                'wordCount': len(words),
+                'missingWords': [],
+                'cached': True
+            }
+
+    # 빠진 단어는 짧은 보완 요청으로 채우고, 모든 단어를 사용한 이야기만 캐시에 저장
+    story = generate_chaptered_story(words, chapter_size) if mode == 'chapters' else generate_story(words)
+    story, missing = repair_novel(story, words)
+    if not missing:
+        store_novel(key, story)
+
+    return {
+        'story': story,
+        'wordCount': len(words),
+        'missingWords': missing,
+        'cached': False
+    }
+
+# 소설 생성 방식 검증 (single: 한 번에 생성, chapters: chapter_size개 단어씩 장을 나눠 동시에 생성)
+def parse_novel_mode(data):
+    mode = data.get('mode', 'single')
+    if mode not in NOVEL_MODES:
+        raise ValueError(f'mode must be one of {NOVEL_MODES}')
+    try:
+        chapter_size = max(NOVEL_CHAPTER_MIN_SIZE, int(data.get('chapter_size', NOVEL_CHAPTER_SIZE)))
+    except (TypeError, ValueError):
+        raise ValueError('chapter_size must be a number')
+    return mode, chapter_size
+
+# 소설 생성 API 엔드포인트
+@app.route('/Python/generate-novel', methods=['POST'])
+@limiter.limit("10 per minute")
+@track_live_request
+def generate_novel():
+    try:
+        data = request.get_json()
+        if not data or 'words' not in data:
+            return jsonify({'error': 'No words provided'}), 400
+
+        try:
+            mode, chapter_size = parse_novel_mode(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify(create_novel(data['words'], data.get('allow_cached', False), mode, chapter_size))
 
     except Exception as e:
         print(f"Error in generate_novel: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+# 소설 생성 스트리밍 API 엔드포인트
+# Gemini가 생성하는 조각을 받는 즉시 전송하고, 마지막에 done(또는 중간 실패 시 error) 레코드 전송
+@app.route('/Python/generate-novel/stream', methods=['POST'])
+@limiter.limit("10 per minute")
+def generate_novel_stream():
+    data = request.get_json()
+    if not data or not data.get('words'):
+        return jsonify({'error': 'No words provided'}), 400
+
+    stream_format = data.get('format', 'ndjson')
+    if stream_format not in ['ndjson', 'sse']:
+        return jsonify({'error': 'format must be ndjson or sse'}), 400
+
+    words = data['words']
+    record_hot_words([word['word'] for word in words if word.get('word')])
+    prompt = build_novel_prompt(words)
+
+    @track_live_request
+    def generate():
+        length = 0
+        parts = []
+        try:
+            response = model.generate_content(prompt, stream=True, request_options={'timeout': NOVEL_TIMEOUT_SECONDS})
+            for chunk in response:
+                text = chunk.text
+                if not text:
+                    continue
+                length += len(text)
+                parts.append(text)
+                yield format_stream_record({'type': 'chunk', 'text': text}, stream_format)
+
+            # 이미 전송한 이야기는 고칠 수 없으므로 빠진 단어만 알리고, 모든 단어를 사용한 이야기만 캐시에 저장
+            story = ''.join(parts).strip()
+            missing = find_missing_words(story, words)
+            if not missing:
+                store_novel(novel_cache_key(words), story)
+            yield format_stream_record({'type': 'done', 'wordCount': len(words), 'length': length, 'missingWords': missing}, stream_format)
+        except Exception as e:
+            print(f"Error in generate_novel_stream: {str(e)}")
+            if is_quota_error(e):
+                mark_gemini_unavailable(e)
+            yield format_stream_record({'type': 'error', 'error': str(e), 'length': length}, stream_format)
+
+    mimetype = 'text/event-stream' if stream_format == 'sse' else 'application/x-ndjson'
+    return Response(generate(), mimetype=mimetype, headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# 보관 시간이 지났거나 최대 보관 개수를 넘은 끝난 작업 결과 삭제 (jobs_lock 안에서 호출)
+def prune_jobs():
+    now = time.time()
+    finished = [job_id for job_id, job in jobs.items() if job.get('finished_at')]
+    for index, job_id in enumerate(finished):
+        if now - jobs[job_id]['finished_at'] > JOB_RESULT_TTL_SECONDS or len(finished) - index > MAX_JOBS:
+            del jobs[job_id]
+
+def update_job(job_id, **fields):
+    with jobs_lock:
+        if job_id in jobs:
+            jobs[job_id].update(fields)
+
+# 작업 실행 (func는 (결과, HTTP 상태 코드) 반환)
+def run_job(job_id, func, *args):
+    update_job(job_id, status='running', started_at=time.time())
+    try:
+        result, status_code = func(*args)
+        update_job(job_id, status='done', result=result, status_code=status_code, finished_at=time.time())
+    except Exception as e:
+        print(f"Error in job {job_id}: {str(e)}")
+        update_job(job_id, status='failed', error=str(e), status_code=500, finished_at=time.time())
+
+# 작업 등록 (대기열이 가득 차면 None)
+def submit_job(job_type, func, *args):
+    job_id = str(uuid.uuid4())
+    with jobs_lock:
+        prune_jobs()
+        pending = sum(1 for job in jobs.values() if job['status'] in ['queued', 'running'])
+        if pending >= JOB_WORKERS + JOB_QUEUE_SIZE:
+            return None
+        jobs[job_id] = {
+            'job_id': job_id,
+            'type': job_type,
+            'status': 'queued',
+            'created_at': time.time()
+        }
+        job = dict(jobs[job_id])
+    # 작업도 사용자 요청이므로 실행 중에는 뉴스 미리 받기를 미룸
+    job_executor.submit(track_live_request(run_job), job_id, func, *args)
+    return job
+
+def run_novel_job(words, allow_cached, mode, chapter_size):
+    return create_novel(words, allow_cached, mode, chapter_size), 200
+
+def job_accepted(job):
+    if job is None:
+        return jsonify({'error': 'Job queue is full, try again later'}), 503
+    job['status_url'] = f"/Python/jobs/{job['job_id']}"
+    return jsonify(job), 202
+
+# 소설 생성 비동기 작업 등록 (202와 작업 ID를 바로 반환, 결과는 /Python/jobs/<job_id>로 조회)
+@app.route('/Python/generate-novel/jobs', methods=['POST'])
+@limiter.limit("10 per minute")
+def submit_novel_job():
+    data = request.get_json()
+    if not data or not data.get('words'):
+        return jsonify({'error': 'No words provided'}), 400
+
+    try:
+        mode, chapter_size = parse_novel_mode(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return job_accepted(submit_job('novel', run_novel_job, data['words'], data.get('allow_cached', False), mode, chapter_size))
+
+# 테스트 생성 비동기 작업 등록
+@app.route('/Python/generate-test/jobs', methods=['POST'])
+@limiter.limit("10 per minute")
+def submit_test_job():
+    try:
+        params = parse_test_request(request.get_json())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return job_accepted(submit_job('test', create_test, params))
+
+# 비동기 작업 상태/결과 조회
+@app.route('/Python/jobs/<job_id>', methods=['GET'])
+@limiter.limit(STATUS_POLL_LIMIT)
+def job_status(job_id):
+    with jobs_lock:
+        prune_jobs()
+        job = jobs.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(dict(job))
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
@@ -0,0 +1,136 @@
+import re
+
+# 자주 쓰는 불규칙 동사/형용사 변화형
+IRREGULAR_FORMS = {
+    'be': ['am', 'is', 'are', 'was', 'were', 'been', 'being'],
+    'have': ['has', 'had', 'having'],
+    'do': ['does', 'did', 'done', 'doing'],
+    'go': ['goes', 'went', 'gone'],
+    'come': ['came'],
+    'get': ['got', 'gotten'],
+    'make': ['made'],
+    'take': ['took', 'taken'],
+    'give': ['gave', 'given'],
+    'see': ['saw', 'seen'],
+    'know': ['knew', 'known'],
+    'think': ['thought'],
+    'bring': ['brought'],
+    'buy': ['bought'],
+    'catch': ['caught'],
+    'teach': ['taught'],
+    'find': ['found'],
+    'feel': ['felt'],
+    'keep': ['kept'],
+    'leave': ['left'],
+    'lose': ['lost'],
+    'meet': ['met'],
+    'pay': ['paid'],
+    'say': ['said'],
+    'sell': ['sold'],
+    'tell': ['told'],
+    'send': ['sent'],
+    'spend': ['spent'],
+    'build': ['built'],
+    'hold': ['held'],
+    'stand': ['stood'],
+    'understand': ['understood'],
+    'write': ['wrote', 'written'],
+    'speak': ['spoke', 'spoken'],
+    'break': ['broke', 'broken'],
+    'choose': ['chose', 'chosen'],
+    'drive': ['drove', 'driven'],
+    'eat': ['ate', 'eaten'],
+    'fall': ['fell', 'fallen'],
+    'forget': ['forgot', 'forgotten'],
+    'grow': ['grew', 'grown'],
+    'begin': ['began', 'begun'],
+    'drink': ['drank', 'drunk'],
+    'run': ['ran'],
+    'swim': ['swam', 'swum'],
+    'sing': ['sang', 'sung'],
+    'fly': ['flew', 'flown'],
+    'draw': ['drew', 'drawn'],
+    'throw': ['threw', 'thrown'],
+    'wear': ['wore', 'worn'],
+    'win': ['won'],
+    'sit': ['sat'],
+    'sleep': ['slept'],
+    'lead': ['led'],
+    'feed': ['fed'],
+    'child': ['children'],
+    'man': ['men'],
+    'woman': ['women'],
+    'person': ['people'],
+    'mouse': ['mice'],
+    'foot': ['feet'],
+    'tooth': ['teeth'],
+    'good': ['better', 'best'],
+    'bad': ['worse', 'worst'],
+}
+VOWELS = 'aeiou'
+
+
+# 단어 1개의 변화형 (복수형, 3인칭, 과거형, 진행형, 비교급)
+def inflect(token):
+    forms = {token, token + 's', token + 'ed', token + 'ing', token + 'er', token + 'est'}
+    forms.update(IRREGULAR_FORMS.get(token, []))
+
+    if token.endswith(('s', 'x', 'z', 'ch', 'sh', 'o')):
+        forms.add(token + 'es')
+    if len(token) >= 4:
+        forms.add(token + 'ly')
+
+    if token.endswith('y') and len(token) > 2 and token[-2] not in VOWELS:
+        stem = token[:-1]
+        forms.update([stem + 'ies', stem + 'ied', stem + 'ier', stem + 'iest', stem + 'ily'])
+    if token.endswith('e') and len(token) > 2:
+        forms.update([token + 'd', token + 'r', token + 'st', token[:-1] + 'ing'])
+    if token.endswith('ie'):
+        forms.add(token[:-2] + 'ying')
+    if token.endswith(('f', 'fe')):
+        forms.add(token.rstrip('e')[:-1] + 'ves')
+    # 단모음 + 단자음으로 끝나면 자음 중복 (stop -> stopped, stopping)
+    if len(token) >= 3 and token[-1] not in VOWELS + 'wxy' and token[-2] in VOWELS and token[-3] not in VOWELS:
+        forms.update([token + token[-1] + 'ed', token + token[-1] + 'ing', token + token[-1] + 'er', token + token[-1] + 'est'])
+    return forms
+
+
+# 단어/숙어의 변화형 목록 (숙어는 첫 단어만 변화: give up -> gave up)
+def word_forms(word):
+    tokens = word.strip().lower().split()
+    if not tokens:
+        return set()
+    return {' '.join([form] + tokens[1:]) for form in inflect(tokens[0])}
+
+
+class WordCoverage:
+    """이야기에 단어 목록이 모두 쓰였는지 확인하는 검사기.
+
+    모든 단어의 변화형을 하나의 정규식으로 컴파일해서 본문을 한 번만 훑는다.
+    괄호 표시 '(apple)'와 표시 없는 'apples' 모두 사용한 것으로 본다.
+    """
+
+    def __init__(self, words):
+        self.words = list(dict.fromkeys(word.strip() for word in words if word and word.strip()))
+        self._form_to_words = {}
+        for word in self.words:
+            for form in word_forms(word):
+                self._form_to_words.setdefault(form, set()).add(word)
+
+        # 긴 변화형부터 시도해야 'going'이 'go'로 잘리지 않음
+        forms = sorted(self._form_to_words, key=len, reverse=True)
+        alternation = '|'.join(r'\s+'.join(re.escape(part) for part in form.split()) for form in forms)
+        self._pattern = re.compile(r"(?<![A-Za-z'])(" + alternation + r")(?![A-Za-z])", re.IGNORECASE) if forms else None
+
+    def used(self, text):
+        if self._pattern is None:
+            return set()
+        found = set()
+        for match in self._pattern.finditer(text):
+            found.update(self._form_to_words.get(' '.join(match.group(1).lower().split()), ()))
+        return found
+
+    # 빠진 단어를 원래 순서대로 반환
+    def missing(self, text):
+        found = self.used(text)
+        return [word for word in self.words if word not in found]
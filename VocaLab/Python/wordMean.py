@@ -3,7 +3,14 @@ from flask_cors import CORS
 import google.generativeai as genai
 import json
 import os 
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from cacheStore import TwoTierCache
+from lookupLog import LookupLog
+from structuredOutput import generate_record, generate_records
+from singleFlight import SingleFlight
+import hashlib
+import time
 
 load_dotenv('env/api.env')  # env/api.env 파일 로드
 
@@ -17,6 +24,172 @@ model = genai.GenerativeModel('gemini-1.5-flash')
 app = Flask(__name__)
 CORS(app)
 
+# 로컬 단어 사전 (단어 -> word, partofspeech, mean, speech, example)
+# 한 번 Gemini로 찾은 단어는 만료 없이 보관하고, 자주 찾는 단어는 메모리에서 바로 응답
+word_dictionary = TwoTierCache(
+    'word_mean',
+    max_memory_items=int(os.getenv('word_dictionary_memory_items', 20000)),
+    ttl_seconds=None,
+    max_disk_items=int(os.getenv('word_dictionary_disk_items', 1000000))
+)
+
+# 단어 조회 기록 (Gemini 결과 포함, 요청 처리 중에는 메모리에만 쌓고 백그라운드에서 파일에 기록)
+lookup_log = LookupLog(
+    'word_mean',
+    max_bytes=int(os.getenv('word_mean_log_max_bytes', 10 * 1024 * 1024)),
+    backup_count=int(os.getenv('word_mean_log_backups', 5)),
+    flush_interval=float(os.getenv('word_mean_log_flush_seconds', 1.0))
+)
+
+# 조회 기록 추가 (source: dictionary 또는 gemini, Gemini 결과는 record를 같이 기록해서 사전 복구에 사용)
+def log_lookup(key, source, record=None):
+    entry = {'ts': time.time(), 'key': key, 'source': source}
+    if record is not None:
+        entry['record'] = record
+    lookup_log.append(entry)
+
+# 조회 기록의 Gemini 결과를 사전에 다시 저장 (사전 파일을 잃었거나 새 서버를 준비할 때)
+def replay_lookup_log():
+    restored = 0
+    for entry in lookup_log.replay():
+        record = entry.get('record')
+        if entry.get('source') == 'gemini' and isinstance(record, dict) and record.get('mean'):
+            word_dictionary.set(entry['key'], record)
+            restored += 1
+    print(f"Replayed {restored} word records from lookup log")
+    return restored
+
+# 같은 단어(또는 같은 단어 묶음)의 동시 Gemini 호출을 1번으로 합치고, 실패는 잠시 기억
+word_mean_flight = SingleFlight('word_mean')
+
+# 여러 단어 뜻 조회 설정 (요청당 최대 단어 수, 프롬프트 1개당 단어 수, 동시 호출 수, 빠진 단어 재요청 횟수)
+WORD_MEAN_BATCH_MAX = int(os.getenv('word_mean_batch_max', 300))
+WORD_MEAN_CHUNK_SIZE = int(os.getenv('word_mean_chunk_size', 20))
+WORD_MEAN_FOLLOWUP_ROUNDS = int(os.getenv('word_mean_followup_rounds', 1))
+word_mean_executor = ThreadPoolExecutor(max_workers=int(os.getenv('word_mean_workers', 4)))
+
+# 단어 뜻 응답 스키마 (모든 필드 필수, 빠진 필드만 다시 요청)
+WORD_MEAN_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'word': {'type': 'string'},
+        'partofspeech': {'type': 'string'},
+        'mean': {'type': 'string'},
+        'speech': {'type': 'string'},
+        'example': {'type': 'string'},
+    },
+    'required': ['word', 'partofspeech', 'mean', 'speech', 'example']
+}
+WORD_MEAN_RULES = "word는 영단어, partofspeech는 품사, mean은 한국어 뜻, speech는 발음기호, example은 생성한 예문 1개를 '예문(예문의 뜻)' 형태로 작성하시오."
+
+# 사전 키 (대소문자, 앞뒤/중복 공백 무시)
+def dictionary_key(word):
+    return ' '.join(str(word).split()).lower()
+
+# 단어 사전 적중/실패 통계
+@app.route('/Python/word-mean/stats', methods=['GET'])
+def word_mean_stats():
+    stats = word_dictionary.stats()
+    stats['log'] = lookup_log.stats()
+    stats['single_flight'] = word_mean_flight.stats()
+    return jsonify(stats)
+
+# 여러 단어 뜻 요청 프롬프트
+def build_word_means_prompt(words):
+    return f"다음 영단어 각각에 대한 json 객체를 배열로 보내시오. {WORD_MEAN_RULES}\n{json.dumps(words, ensure_ascii=False)}"
+
+# 여러 단어의 뜻을 한 번에 요청 (응답에서 빠졌거나 필드가 부족한 단어만 다시 요청, 사전 키 -> 레코드 반환)
+def generate_word_means(words):
+    return generate_records(model, build_word_means_prompt, words, 'word', WORD_MEAN_SCHEMA,
+                            repair_rounds=WORD_MEAN_FOLLOWUP_ROUNDS, normalize=dictionary_key)
+
+# 사전에 없는 단어를 WORD_MEAN_CHUNK_SIZE개씩 나눠 동시에 요청하고 사전에 저장
+def resolve_word_means(keys):
+    found = {}
+    chunks = [keys[start:start + WORD_MEAN_CHUNK_SIZE] for start in range(0, len(keys), WORD_MEAN_CHUNK_SIZE)]
+    # 같은 단어 묶음(같은 단어장)의 동시 요청은 1번만 생성
+    futures = [word_mean_executor.submit(word_mean_flight.do, chunk_key(chunk), generate_and_store_word_means, chunk) for chunk in chunks]
+    for chunk, future in zip(chunks, futures):
+        try:
+            records = future.result()
+        except Exception as e:
+            print(f"Error in generate_word_means: {str(e)}")
+            continue
+        found.update((key, records[key]) for key in chunk if key in records)
+    return found
+
+# 단어 묶음 키 (사전 키 목록 해시)
+def chunk_key(keys):
+    return 'batch:' + hashlib.sha1('\n'.join(keys).encode('utf-8')).hexdigest()
+
+# 단어 묶음의 뜻을 생성해 사전에 저장
+def generate_and_store_word_means(keys):
+    records = generate_word_means(keys)
+    for key in keys:
+        if key in records:
+            word_dictionary.set(key, records[key])
+            log_lookup(key, 'gemini', records[key])
+    return records
+
+# 요청 항목에서 단어 추출 (문자열, 또는 단어장 항목의 word/english 필드)
+def extract_word(item):
+    if isinstance(item, dict):
+        item = item.get('word') or item.get('english')
+    return item if isinstance(item, str) and item.strip() else None
+
+# 여러 단어 뜻 조회 API (단어장 전체 등)
+# 중복을 제거하고 사전에 있는 단어는 바로, 나머지는 여러 단어 프롬프트로 조회해서 입력 순서대로 반환
+@app.route('/Python/word-mean/batch', methods=['POST'])
+def word_mean_batch():
+    data = request.get_json()
+    items = (data or {}).get('words')
+    if not items or not isinstance(items, list):
+        return jsonify({"error": "words list is missing"}), 400
+    if len(items) > WORD_MEAN_BATCH_MAX:
+        return jsonify({"error": f"Too many words (max {WORD_MEAN_BATCH_MAX})"}), 400
+
+    try:
+        words = [extract_word(item) for item in items]
+        keys = list(dict.fromkeys(dictionary_key(word) for word in words if word))
+
+        records = {}
+        for key in keys:
+            cached = word_dictionary.get(key)
+            if cached is not None:
+                records[key] = cached
+                log_lookup(key, 'dictionary')
+        cached_count = len(records)
+
+        records.update(resolve_word_means([key for key in keys if key not in records]))
+
+        results = []
+        for word in words:
+            record = records.get(dictionary_key(word)) if word else None
+            results.append(record if record is not None else {"word": word, "error": "Word meaning not found"})
+
+        return jsonify({
+            "results": results,
+            "total": len(keys),
+            "cached": cached_count,
+            "generated": len(records) - cached_count,
+            "failed": len(keys) - len(records)
+        })
+
+    except Exception as e:
+        return jsonify({"error": "An unexpected error occurred", "details": str(e)}), 500
+
+# 단어 1개의 뜻을 생성해 사전에 저장
+def generate_and_store_word_mean(key, word):
+    print("Send to Gemini: ",word)
+    # JSON 모드 + 응답 스키마로 요청 (빠진 필드만 다시 요청)
+    parsed_json = generate_record(model, f"{word} 에 대한 json 객체 1개를 보내시오. {WORD_MEAN_RULES}", WORD_MEAN_SCHEMA)
+    print(parsed_json)
+
+    # 사전에 저장 (조회 기록은 백그라운드에서 파일에 기록)
+    word_dictionary.set(key, parsed_json)
+    log_lookup(key, 'gemini', parsed_json)
+    return parsed_json
+
 @app.route('/Python/word-mean', methods=['POST'])
 def word_mean():
     data = request.get_json()
@@ -24,43 +197,28 @@ def word_mean():
     if not word:
         return jsonify({"error": "word parameter is missing"}), 400  # 오류 응답
 
-    print("Send to Gemini: ",word)
-    # Google Generative AI API 호출
+    # 사전에 있는 단어는 Gemini 호출 없이 응답
+    key = dictionary_key(word)
+    cached = word_dictionary.get(key)
+    if cached is not None:
+        log_lookup(key, 'dictionary')
+        return jsonify(cached)
+
+    # Google Generative AI API 호출 (같은 단어를 동시에 요청하면 처음 요청의 결과를 같이 사용)
     try:
-        response = model.generate_content(
-            f"{word} 을 {{word:word, partofspeech:품사, mean:한국어 뜻, speech:발음기호, example:생성한 예문(예문의 뜻)}} (단,예문은 1개이며 '예문(뜻)'형태여야함. 그리고 json 배열을 {word}로 감싸면 안됨.) 형태로 json 형식으로 1개만 보내시오."
-        )
-        response_content = response.text
-        print(response_content)
-
-        # JSON 데이터 추출
-        json_start = response_content.find("{")
-        json_end = response_content.rfind("}")
-        if json_start == -1 or json_end == -1:
-            return jsonify({"error": "JSON data not found in AI response"}), 500  # 오류 응답
-
-        json_text = response_content[json_start:json_end + 1]
-        
-        print(json_text)
-
-        # JSON 텍스트를 파싱
-        parsed_json = json.loads(json_text)
-
-        # 만약 응답이 단어를 키로 가지는 형태라면 내부 객체만 추출
-        if isinstance(parsed_json, dict) and len(parsed_json) == 1 and word.lower() in parsed_json:
-            parsed_json = parsed_json[word.lower()]
-
-        # 파싱된 데이터를 파일로 저장 (옵션)
-        with open("word_mean.json", "w", encoding="utf-8") as json_file:
-            json.dump(parsed_json, json_file, ensure_ascii=False, indent=4)
-        
+        parsed_json = word_mean_flight.do(f"word:{key}", generate_and_store_word_mean, key, word)
         return jsonify(parsed_json)
 
     except json.JSONDecodeError as e:
         return jsonify({"error": "Failed to parse JSON", "details": str(e)}), 500
 
+    except ValueError as e:
+        return jsonify({"error": "Invalid AI response", "details": str(e)}), 500
+
     except Exception as e:
         return jsonify({"error": "An unexpected error occurred", "details": str(e)}), 500
 
 if __name__ == '__main__':
+    if os.getenv('word_mean_replay_log', 'false').lower() == 'true':
+        replay_lookup_log()
     app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
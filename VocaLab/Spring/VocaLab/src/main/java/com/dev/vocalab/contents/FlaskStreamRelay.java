@@ -0,0 +1,76 @@
+package com.dev.vocalab.contents;
+
+import com.fasterxml.jackson.databind.ObjectMapper;
+import org.springframework.http.HttpMethod;
+import org.springframework.http.HttpStatus;
+import org.springframework.http.HttpStatusCode;
+import org.springframework.http.MediaType;
+import org.springframework.http.ResponseEntity;
+import org.springframework.http.client.ClientHttpRequest;
+import org.springframework.http.client.ClientHttpResponse;
+import org.springframework.stereotype.Component;
+import org.springframework.web.client.RestTemplate;
+import org.springframework.web.servlet.mvc.method.annotation.StreamingResponseBody;
+
+import java.io.IOException;
+import java.io.InputStream;
+import java.net.URI;
+import java.util.Map;
+
+// Flask 스트리밍 API 중계 (테스트/소설 스트리밍 공용)
+// Flask의 상태 코드와 Content-Type을 그대로 전달하고, 본문은 받는 대로 바로 전달
+// 400 등 오류 응답도 Flask의 오류 JSON을 그대로 전달
+@Component
+public class FlaskStreamRelay {
+
+    private final RestTemplate restTemplate;
+    private final ObjectMapper objectMapper = new ObjectMapper();
+
+    public FlaskStreamRelay(RestTemplate restTemplate) {
+        this.restTemplate = restTemplate;
+    }
+
+    public ResponseEntity<StreamingResponseBody> relay(String url, Map<String, Object> request) {
+        ClientHttpResponse flaskResponse;
+        HttpStatusCode status;
+        MediaType contentType;
+        try {
+            flaskResponse = send(url, request);
+            status = flaskResponse.getStatusCode();
+            contentType = flaskResponse.getHeaders().getContentType();
+        } catch (IOException e) {
+            System.out.println("Error relaying stream: " + e);
+            return ResponseEntity.status(HttpStatus.BAD_GATEWAY)
+                    .contentType(MediaType.APPLICATION_JSON)
+                    .body(outputStream -> objectMapper.writeValue(outputStream,
+                            Map.of("error", "Stream server unavailable: " + e.getMessage())));
+        }
+
+        ResponseEntity.BodyBuilder response = ResponseEntity.status(status);
+        if (contentType != null) {
+            response.contentType(contentType);
+        }
+        return response.body(stream(flaskResponse));
+    }
+
+    // Flask로 요청 전송 (RestTemplate의 오류 처리 없이 응답을 그대로 받음)
+    private ClientHttpResponse send(String url, Map<String, Object> request) throws IOException {
+        ClientHttpRequest flaskRequest = restTemplate.getRequestFactory().createRequest(URI.create(url), HttpMethod.POST);
+        flaskRequest.getHeaders().setContentType(MediaType.APPLICATION_JSON);
+        objectMapper.writeValue(flaskRequest.getBody(), request);
+        return flaskRequest.execute();
+    }
+
+    private StreamingResponseBody stream(ClientHttpResponse flaskResponse) {
+        return outputStream -> {
+            try (flaskResponse; InputStream inputStream = flaskResponse.getBody()) {
+                byte[] buffer = new byte[1024];
+                int read;
+                while ((read = inputStream.read(buffer)) != -1) {
+                    outputStream.write(buffer, 0, read);
+                    outputStream.flush();
+                }
+            }
+        };
+    }
+}
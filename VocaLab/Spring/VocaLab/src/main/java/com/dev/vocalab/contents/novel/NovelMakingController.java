@@ -1,5 +1,6 @@
 package com.dev.vocalab.contents.novel;
 
+import com.dev.vocalab.contents.FlaskStreamRelay;
 import com.dev.vocalab.users.details.AuthenticationUtil;
 import jakarta.servlet.http.HttpSession;
 import org.springframework.http.HttpEntity;
@@ -10,6 +11,7 @@ import org.springframework.stereotype.Controller;
 import org.springframework.ui.Model;
 import org.springframework.web.bind.annotation.*;
 import org.springframework.web.client.RestTemplate;
+import org.springframework.web.servlet.mvc.method.annotation.StreamingResponseBody;
 
 import java.util.ArrayList;
 import java.util.HashMap;
@@ -21,10 +23,12 @@ import java.util.Map;
 public class NovelMakingController {
 
     private final RestTemplate restTemplate;
+    private final FlaskStreamRelay flaskStreamRelay;
     private final String FLASK_API_URL = "http://im.21v.in:28116/Python/generate-novel"; // FLASK 호출명과 같게하면됨
 
-    public NovelMakingController(RestTemplate restTemplate) {
+    public NovelMakingController(RestTemplate restTemplate, FlaskStreamRelay flaskStreamRelay) {
         this.restTemplate = restTemplate;
+        this.flaskStreamRelay = flaskStreamRelay;
     }
 
     // 소설 생성 페이지 보여주기
@@ -92,4 +96,12 @@ public class NovelMakingController {
                     .body(Map.of("error", "Error generating novel: " + e.getMessage()));
         }
     }
+
+    // 소설 스트리밍 생성 (Flask가 Gemini 출력 조각을 받는 대로 그대로 전달)
+    @PostMapping("/generate-novel/stream")
+    public ResponseEntity<StreamingResponseBody> generateNovelStream(@RequestBody Map<String, Object> request) {
+        System.out.println("Received Stream Request: " + request);
+
+        return flaskStreamRelay.relay(FLASK_API_URL + "/stream", request);
+    }
 }
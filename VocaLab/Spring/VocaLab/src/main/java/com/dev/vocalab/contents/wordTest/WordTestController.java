@@ -1,5 +1,6 @@
 package com.dev.vocalab.contents.wordTest;
 
+import com.dev.vocalab.contents.FlaskStreamRelay;
 import com.dev.vocalab.users.details.AuthenticationUtil;
 import com.dev.vocalab.wordbooks.WordBooksDTO;
 import jakarta.servlet.http.HttpSession;
@@ -8,6 +9,7 @@ import org.springframework.stereotype.Controller;
 import org.springframework.ui.Model;
 import org.springframework.web.bind.annotation.*;
 import org.springframework.web.client.RestTemplate;
+import org.springframework.web.servlet.mvc.method.annotation.StreamingResponseBody;
 
 import java.util.*;
 
@@ -16,10 +18,12 @@ import java.util.*;
 public class WordTestController {
 
     private final RestTemplate restTemplate;
+    private final FlaskStreamRelay flaskStreamRelay;
     private final String FLASK_API_URL = "http://im.21v.in:28116/Python/generate-test"; // FLASK 호출명과 같게하면됨
 
-    public WordTestController(RestTemplate restTemplate) {
+    public WordTestController(RestTemplate restTemplate, FlaskStreamRelay flaskStreamRelay) {
         this.restTemplate = restTemplate;
+        this.flaskStreamRelay = flaskStreamRelay;
     }
 
     // 테스트 페이지 보여주기
@@ -93,4 +97,12 @@ public class WordTestController {
                     .body(Map.of("error", "Error generating test: " + e.getMessage()));
         }
     }
+
+    // 테스트 데이터 스트리밍 생성 (Flask가 문제를 만드는 대로 NDJSON 또는 SSE 레코드를 그대로 전달)
+    @PostMapping("/generate-test/stream")
+    public ResponseEntity<StreamingResponseBody> generateTestStream(@RequestBody Map<String, Object> request) {
+        System.out.println("Received Stream Request: " + request);
+
+        return flaskStreamRelay.relay(FLASK_API_URL + "/stream", request);
+    }
 }
\ No newline at end of file
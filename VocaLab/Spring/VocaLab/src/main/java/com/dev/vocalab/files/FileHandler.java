@@ -160,6 +160,12 @@ public class FileHandler {
             if (response.getStatusCode().is2xxSuccessful() && response.getBody() != null) {
                 System.out.println("여기1");
                 Map<String, Object> responseBody = response.getBody();
+
+                // Python 서버가 스키마로 검증한 단어 목록을 보내면 그대로 사용
+                if (responseBody.get("words") instanceof List) {
+                    return (List<Map<String, Object>>) responseBody.get("words");
+                }
+
                 Map<String, Object> responseMap = (Map<String, Object>) responseBody.get("response");
                 List<Map<String, Object>> candidates = (List<Map<String, Object>>) responseMap.get("candidates");
                 Map<String, Object> content = (Map<String, Object>) candidates.get(0).get("content");